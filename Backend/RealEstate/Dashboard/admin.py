@@ -2,6 +2,12 @@ from django.contrib import admin
 from .models import Property, InvestmentMetrics, UserWatchlist, MarketData, UserOwnedProperty, RentalTransaction, PortfolioMetrics
 
 
+def _is_changelist(request):
+    """Change forms need every column, so only trim the changelist queries"""
+    match = request.resolver_match
+    return bool(match and match.url_name and match.url_name.endswith('_changelist'))
+
+
 @admin.register(Property)
 class PropertyAdmin(admin.ModelAdmin):
     list_display = ('address', 'city', 'state', 'property_type',
@@ -10,19 +16,48 @@ class PropertyAdmin(admin.ModelAdmin):
     search_fields = ('address', 'city', 'state', 'zip_code')
     readonly_fields = ('created_at', 'updated_at', 'last_api_sync')
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if _is_changelist(request):
+            queryset = queryset.only(
+                'id', 'address', 'city', 'state', 'property_type',
+                'current_price', 'estimated_rent')
+        return queryset
+
 
 @admin.register(InvestmentMetrics)
 class InvestmentMetricsAdmin(admin.ModelAdmin):
     list_display = ('property_ref', 'investment_score', 'cap_rate',
                     'gross_rental_yield', 'calculated_at')
     list_filter = ('calculated_at',)
+    list_select_related = ('property_ref',)
     readonly_fields = ('calculated_at',)
 
+    def get_queryset(self, request):
+        # property_ref renders as "address, city, state"
+        queryset = super().get_queryset(request).select_related('property_ref')
+        if _is_changelist(request):
+            queryset = queryset.only(
+                'id', 'investment_score', 'cap_rate', 'gross_rental_yield',
+                'calculated_at', 'property_ref__address', 'property_ref__city',
+                'property_ref__state')
+        return queryset
+
 
 @admin.register(UserWatchlist)
 class UserWatchlistAdmin(admin.ModelAdmin):
     list_display = ('user', 'property_ref', 'added_at')
     list_filter = ('added_at',)
+    list_select_related = ('user', 'property_ref')
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if _is_changelist(request):
+            # property_ref renders as "address, city, state"
+            queryset = queryset.only(
+                'id', 'added_at', 'user__username', 'property_ref__address',
+                'property_ref__city', 'property_ref__state')
+        return queryset
 
 
 @admin.register(MarketData)
@@ -38,6 +73,8 @@ class UserOwnedPropertyAdmin(admin.ModelAdmin):
     list_display = ('user', 'address', 'city', 'state', 'purchase_price',
                     'status', 'purchase_date')
     list_filter = ('status', 'purchase_date', 'custom_state')
+    list_select_related = ('user', 'property_ref')
+    autocomplete_fields = ('user', 'property_ref')
     search_fields = ('user__username', 'custom_address', 'custom_city',
                      'property_ref__address')
     readonly_fields = ('created_at', 'updated_at')
@@ -69,12 +106,29 @@ class UserOwnedPropertyAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # __str__ reads user.username and property_ref.address, which the
+        # owned_property autocomplete renders for every result
+        queryset = super().get_queryset(request).select_related(
+            'user', 'property_ref')
+        if _is_changelist(request):
+            # address/city/state read through property_ref when it is set
+            queryset = queryset.only(
+                'id', 'user__username', 'property_ref__address',
+                'property_ref__city', 'property_ref__state', 'custom_address',
+                'custom_city', 'custom_state', 'purchase_price', 'status',
+                'purchase_date')
+        return queryset
+
 
 @admin.register(RentalTransaction)
 class RentalTransactionAdmin(admin.ModelAdmin):
     list_display = ('owned_property', 'transaction_type', 'category',
                     'amount', 'date', 'description')
     list_filter = ('transaction_type', 'category', 'date', 'receipt_uploaded')
+    list_select_related = ('owned_property__user',
+                           'owned_property__property_ref')
+    autocomplete_fields = ('owned_property',)
     search_fields = ('owned_property__custom_address', 'description')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'date'
@@ -93,12 +147,25 @@ class RentalTransactionAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # owned_property.__str__ reads user.username and property_ref.address
+        queryset = super().get_queryset(request).select_related(
+            'owned_property__user', 'owned_property__property_ref')
+        if _is_changelist(request):
+            queryset = queryset.only(
+                'id', 'transaction_type', 'category', 'amount', 'date',
+                'description', 'owned_property__user__username',
+                'owned_property__custom_address',
+                'owned_property__property_ref__address')
+        return queryset
+
 
 @admin.register(PortfolioMetrics)
 class PortfolioMetricsAdmin(admin.ModelAdmin):
     list_display = ('user', 'total_properties', 'portfolio_value',
                     'monthly_cash_flow', 'cash_on_cash_return', 'calculated_at')
     list_filter = ('calculated_at',)
+    list_select_related = ('user',)
     search_fields = ('user__username',)
     readonly_fields = ('calculated_at',)
 
@@ -123,3 +190,11 @@ class PortfolioMetricsAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if _is_changelist(request):
+            queryset = queryset.only(
+                'id', 'user__username', 'total_properties', 'portfolio_value',
+                'monthly_cash_flow', 'cash_on_cash_return', 'calculated_at')
+        return queryset
@@ -1,12 +1,67 @@
 import django_filters
-from django.db import models
+from django.db.models import Exists, OuterRef
 from .models import Property, InvestmentMetrics
 
 
+# (model path, public name) pairs accepted by PropertyFilter's ordering
+ORDERING_FIELDS = (
+    ('cached_investment_score', 'investment_score'),
+    ('cached_cap_rate', 'cap_rate'),
+    ('metrics__gross_rental_yield', 'gross_rental_yield'),
+    ('metrics__cash_on_cash_return', 'cash_on_cash_return'),
+    ('cached_noi', 'noi'),
+    ('metrics__estimated_profit', 'estimated_profit'),
+    ('metrics__price_to_rent_ratio', 'price_to_rent_ratio'),
+    ('metrics__risk_score', 'risk_score'),
+    ('current_price', 'price'),
+    ('estimated_value', 'estimated_value'),
+    ('estimated_rent', 'estimated_rent'),
+    ('square_feet', 'square_feet'),
+    ('year_built', 'year_built'),
+    ('created_at', 'created_at'),
+    ('last_api_sync', 'last_api_sync'),
+)
+
+# best_deals sort keys served by columns denormalized onto Property
+CACHED_METRIC_ORDERING = {
+    'metrics__investment_score': 'cached_investment_score',
+    'metrics__cap_rate': 'cached_cap_rate',
+    'metrics__net_operating_income': 'cached_noi',
+}
+
+# Every ordering value the filter accepts: the public names, each ascending
+# or descending
+ALLOWED_SORTS = frozenset(
+    prefix + name
+    for _, name in ORDERING_FIELDS
+    for prefix in ('', '-')
+)
+
+# Public name -> model path, and back; best_deals' sort options send model
+# paths, including the metrics__* columns copied onto Property
+SORT_PATHS = {name: path for path, name in ORDERING_FIELDS}
+SORT_NAMES = {path: name for path, name in ORDERING_FIELDS}
+SORT_NAMES.update({path: SORT_NAMES[column]
+                   for path, column in CACHED_METRIC_ORDERING.items()})
+
+
+def resolve_ordering(ordering, default='-investment_score'):
+    """
+    order_by() argument for one ordering value, given as a public name or a
+    model path with an optional '-'. Values outside ALLOWED_SORTS get default.
+    """
+    descending = ordering.startswith('-')
+    name = ordering.lstrip('-')
+    key = ('-' if descending else '') + SORT_NAMES.get(name, name)
+    if key not in ALLOWED_SORTS:
+        key = default
+    return ('-' if key.startswith('-') else '') + SORT_PATHS[key.lstrip('-')]
+
+
 class PropertyFilter(django_filters.FilterSet):
     """Advanced filtering for properties with investment metrics"""
 
-    # Location filters
+    # Location filters (backed by pg_trgm indexes on PostgreSQL, see 0010)
     city = django_filters.CharFilter(lookup_expr='icontains')
     state = django_filters.CharFilter(lookup_expr='icontains')
     zip_code = django_filters.CharFilter(lookup_expr='icontains')
@@ -48,15 +103,16 @@ class PropertyFilter(django_filters.FilterSet):
     max_annual_taxes = django_filters.NumberFilter(
         field_name='annual_taxes', lookup_expr='lte')
 
-    # Investment metrics filters
+    # Investment metrics filters (score, cap rate and NOI read the copies
+    # denormalized onto Property)
     min_investment_score = django_filters.NumberFilter(
-        field_name='metrics__investment_score', lookup_expr='gte')
+        field_name='cached_investment_score', lookup_expr='gte')
     max_investment_score = django_filters.NumberFilter(
-        field_name='metrics__investment_score', lookup_expr='lte')
+        field_name='cached_investment_score', lookup_expr='lte')
     min_cap_rate = django_filters.NumberFilter(
-        field_name='metrics__cap_rate', lookup_expr='gte')
+        field_name='cached_cap_rate', lookup_expr='gte')
     max_cap_rate = django_filters.NumberFilter(
-        field_name='metrics__cap_rate', lookup_expr='lte')
+        field_name='cached_cap_rate', lookup_expr='lte')
     min_gross_rental_yield = django_filters.NumberFilter(
         field_name='metrics__gross_rental_yield', lookup_expr='gte')
     max_gross_rental_yield = django_filters.NumberFilter(
@@ -66,9 +122,9 @@ class PropertyFilter(django_filters.FilterSet):
     max_cash_on_cash_return = django_filters.NumberFilter(
         field_name='metrics__cash_on_cash_return', lookup_expr='lte')
     min_noi = django_filters.NumberFilter(
-        field_name='metrics__net_operating_income', lookup_expr='gte')
+        field_name='cached_noi', lookup_expr='gte')
     max_noi = django_filters.NumberFilter(
-        field_name='metrics__net_operating_income', lookup_expr='lte')
+        field_name='cached_noi', lookup_expr='lte')
     min_estimated_profit = django_filters.NumberFilter(
         field_name='metrics__estimated_profit', lookup_expr='gte')
     max_estimated_profit = django_filters.NumberFilter(
@@ -87,8 +143,7 @@ class PropertyFilter(django_filters.FilterSet):
     max_roi = django_filters.NumberFilter(method='filter_max_roi')
 
     # Special filters
-    has_metrics = django_filters.BooleanFilter(
-        field_name='metrics', lookup_expr='isnull', exclude=True)
+    has_metrics = django_filters.BooleanFilter(method='filter_has_metrics')
     is_profitable = django_filters.BooleanFilter(method='filter_profitable')
     high_cap_rate = django_filters.BooleanFilter(method='filter_high_cap_rate')
     good_cash_flow = django_filters.BooleanFilter(
@@ -96,23 +151,7 @@ class PropertyFilter(django_filters.FilterSet):
 
     # Sorting options
     ordering = django_filters.OrderingFilter(
-        fields=(
-            ('metrics__investment_score', 'investment_score'),
-            ('metrics__cap_rate', 'cap_rate'),
-            ('metrics__gross_rental_yield', 'gross_rental_yield'),
-            ('metrics__cash_on_cash_return', 'cash_on_cash_return'),
-            ('metrics__net_operating_income', 'noi'),
-            ('metrics__estimated_profit', 'estimated_profit'),
-            ('metrics__price_to_rent_ratio', 'price_to_rent_ratio'),
-            ('metrics__risk_score', 'risk_score'),
-            ('current_price', 'price'),
-            ('estimated_value', 'estimated_value'),
-            ('estimated_rent', 'estimated_rent'),
-            ('square_feet', 'square_feet'),
-            ('year_built', 'year_built'),
-            ('created_at', 'created_at'),
-            ('last_api_sync', 'last_api_sync'),
-        ),
+        fields=ORDERING_FIELDS,
         field_labels={
             'investment_score': 'Investment Score',
             'cap_rate': 'Cap Rate',
@@ -136,45 +175,49 @@ class PropertyFilter(django_filters.FilterSet):
         model = Property
         fields = []  # All fields are defined above
 
+    def __init__(self, data=None, *args, **kwargs):
+        # Drop unknown or empty sort keys, as DRF's OrderingFilter does
+        ordering = data.get('ordering') if data else None
+        if ordering:
+            data = data.copy()
+            data['ordering'] = ','.join(
+                key for key in (key.strip() for key in ordering.split(','))
+                if key in ALLOWED_SORTS)
+        super().__init__(data, *args, **kwargs)
+
     def filter_min_roi(self, queryset, name, value):
         """Filter by minimum ROI (annualized return)"""
-        return queryset.filter(
-            models.Q(metrics__net_operating_income__isnull=False) &
-            models.Q(current_price__isnull=False) &
-            models.Q(current_price__gt=0)
-        ).extra(
-            where=["(metrics.net_operating_income / current_price * 100) >= %s"],
-            params=[value]
-        )
+        return queryset.filter(metrics__annualized_return__gte=value)
 
     def filter_max_roi(self, queryset, name, value):
         """Filter by maximum ROI (annualized return)"""
-        return queryset.filter(
-            models.Q(metrics__net_operating_income__isnull=False) &
-            models.Q(current_price__isnull=False) &
-            models.Q(current_price__gt=0)
-        ).extra(
-            where=["(metrics.net_operating_income / current_price * 100) <= %s"],
-            params=[value]
-        )
+        return queryset.filter(metrics__annualized_return__lte=value)
+
+    def filter_has_metrics(self, queryset, name, value):
+        """Filter on whether metrics exist, without joining their rows"""
+        has_metrics = Exists(InvestmentMetrics.objects.filter(
+            property_ref=OuterRef('pk')))
+        return queryset.filter(has_metrics if value else ~has_metrics)
 
     def filter_profitable(self, queryset, name, value):
         """Filter only profitable properties"""
         if value:
+            metrics = InvestmentMetrics.objects.filter(
+                property_ref=OuterRef('pk'))
             return queryset.filter(
-                models.Q(metrics__net_operating_income__gt=0) |
-                models.Q(metrics__estimated_profit__gt=0)
+                Exists(metrics.filter(net_operating_income__gt=0)) |
+                Exists(metrics.filter(estimated_profit__gt=0))
             )
         return queryset
 
     def filter_high_cap_rate(self, queryset, name, value):
         """Filter properties with cap rate >= 8%"""
         if value:
-            return queryset.filter(metrics__cap_rate__gte=8.0)
+            return queryset.filter(cached_cap_rate__gte=8.0)
         return queryset
 
     def filter_good_cash_flow(self, queryset, name, value):
         """Filter properties with positive monthly cash flow"""
         if value:
-            return queryset.filter(metrics__net_operating_income__gt=0)
+            return queryset.filter(cached_noi__gt=0)
         return queryset
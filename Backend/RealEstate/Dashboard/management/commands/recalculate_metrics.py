@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from Dashboard.filters import PropertyFilter
+from Dashboard.models import Property, InvestmentMetrics
+
+
+class Command(BaseCommand):
+    help = 'Recalculate investment metrics for all properties in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--city',
+            type=str,
+            help='Only recalculate properties in this city'
+        )
+        parser.add_argument(
+            '--state',
+            type=str,
+            help='Only recalculate properties in this state'
+        )
+        parser.add_argument(
+            '--scores-only',
+            action='store_true',
+            help='Only refresh investment scores from stored metrics, in SQL'
+        )
+        parser.add_argument(
+            '--no-ai',
+            action='store_true',
+            help='Skip OpenAI profit predictions'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Properties loaded and written per batch (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['scores_only']:
+            updated = InvestmentMetrics.recompute_scores_sql()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Recalculated investment scores for {updated} properties')
+            )
+            return
+
+        data = {key: options[key] for key in ('city', 'state') if options[key]}
+        properties = PropertyFilter(
+            data, queryset=Property.objects.all()).qs
+
+        InvestmentMetrics.create_missing(properties)
+        updated = InvestmentMetrics.recompute_all(
+            properties, predict_profit=not options['no_ai'],
+            chunk_size=options['chunk_size'])
+
+        if updated:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Recalculated metrics for {updated} properties')
+            )
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    'No properties with a price and rent to recalculate')
+            )
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from Dashboard.models import DealStage
 
 
@@ -33,25 +34,26 @@ class Command(BaseCommand):
             }
         ]
 
-        for stage_data in stages_data:
-            stage, created = DealStage.objects.get_or_create(
-                name=stage_data['name'],
-                defaults={
-                    'display_name': stage_data['display_name'],
-                    'order': stage_data['order'],
-                    'color': stage_data['color']
-                }
+        stage_names = [stage_data['name'] for stage_data in stages_data]
+
+        with transaction.atomic():
+            existing = set(DealStage.objects.filter(
+                name__in=stage_names).values_list('name', flat=True))
+            DealStage.objects.bulk_create(
+                [DealStage(**stage_data) for stage_data in stages_data],
+                ignore_conflicts=True
             )
 
-            if created:
+        for stage_data in stages_data:
+            if stage_data['name'] in existing:
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Created deal stage: {stage.display_name}')
+                    self.style.WARNING(
+                        f"Deal stage already exists: {stage_data['display_name']}")
                 )
             else:
                 self.stdout.write(
-                    self.style.WARNING(
-                        f'Deal stage already exists: {stage.display_name}')
+                    self.style.SUCCESS(
+                        f"Created deal stage: {stage_data['display_name']}")
                 )
 
         self.stdout.write(
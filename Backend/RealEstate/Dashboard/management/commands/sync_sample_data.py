@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from Dashboard.services import PropertyDataSyncer
+from Dashboard.models import InvestmentMetrics, Property
+from Dashboard.services import OpenAIProfitPredictor, PropertyDataSyncer
 
 
 class Command(BaseCommand):
@@ -22,23 +23,49 @@ class Command(BaseCommand):
             default=50,
             help='Number of properties to sync per location'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of properties upserted per query'
+        )
+        parser.add_argument(
+            '--batch-api',
+            action='store_true',
+            help='Queue AI profit predictions through the OpenAI Batch API '
+                 '(half price, done within 24h) instead of waiting for them'
+        )
+        parser.add_argument(
+            '--collect-batch',
+            type=str,
+            metavar='BATCH_ID',
+            help='Apply the predictions of a finished --batch-api run'
+        )
 
     def handle(self, *args, **options):
+        if options.get('collect_batch'):
+            self._collect_batch(options['collect_batch'])
+            return
+
         syncer = PropertyDataSyncer()
 
         city = options.get('city')
         state = options.get('state')
         limit = options['limit']
+        batch_size = options['batch_size']
+        # Property ids whose profit predictions go out in one OpenAI batch
+        self.pending_ids = [] if options['batch_api'] else None
 
         if city and state:
             # Sync specific city/state
             self.stdout.write(f'Syncing properties from {city}, {state}...')
-            properties = syncer.sync_properties_by_location(city, state, limit)
+            properties = syncer.iter_attom_properties(city, state, limit)
+            synced = self._upsert(properties, batch_size)
 
-            if properties:
+            if synced:
                 self.stdout.write(
                     self.style.SUCCESS(
-                        f'Successfully synced {len(properties)} properties from ATTOM API!')
+                        f'Successfully synced {synced} properties from ATTOM API!')
                 )
             else:
                 self.stdout.write(
@@ -50,14 +77,61 @@ class Command(BaseCommand):
             self.stdout.write(
                 'Syncing properties from multiple markets via ATTOM API...')
             properties = syncer.bulk_sync_attom_data()
+            synced = self._upsert(properties, batch_size)
 
-            if properties:
+            if synced:
                 self.stdout.write(
                     self.style.SUCCESS(
-                        f'Successfully synced {len(properties)} total properties from ATTOM API!')
+                        f'Successfully synced {synced} total properties from ATTOM API!')
                 )
             else:
                 self.stdout.write(
                     self.style.WARNING(
                         'No properties found via ATTOM API')
                 )
+
+        if self.pending_ids:
+            self._submit_batch()
+
+    def _upsert(self, records, batch_size):
+        """Consume the record stream in fixed-size batches, return the count"""
+        synced = 0
+        # Keyed on attom_id so a repeated listing never hits one row twice
+        batch = {}
+        for record in records:
+            batch[record['attom_id']] = record
+            if len(batch) >= batch_size:
+                synced += self._ingest(batch)
+                batch.clear()
+        if batch:
+            synced += self._ingest(batch)
+        return synced
+
+    def _ingest(self, batch):
+        """bulk_ingest one batch, deferring AI profits under --batch-api"""
+        if self.pending_ids is None:
+            return Property.bulk_ingest(batch.values())
+        synced = Property.bulk_ingest(batch.values(), predict_profit=False)
+        self.pending_ids.extend(Property.objects.filter(
+            attom_id__in=batch).values_list('id', flat=True))
+        return synced
+
+    def _submit_batch(self):
+        predictor = OpenAIProfitPredictor()
+        batch_id = predictor.submit_batch(list(
+            Property.objects.filter(pk__in=self.pending_ids)
+            .only(*predictor.PROPERTY_FIELDS)))
+        self.stdout.write(
+            f'Queued AI profit predictions as OpenAI batch {batch_id}; '
+            f'apply them with --collect-batch {batch_id}')
+
+    def _collect_batch(self, batch_id):
+        predictions = OpenAIProfitPredictor().collect_batch(batch_id)
+        if predictions is None:
+            self.stdout.write(
+                self.style.WARNING(f'OpenAI batch {batch_id} is still running'))
+            return
+        updated = InvestmentMetrics.apply_profit_predictions(predictions)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Applied AI profit predictions to {updated} properties'))
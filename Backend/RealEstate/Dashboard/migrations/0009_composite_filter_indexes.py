@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0008_portfoliometrics_userownedproperty_rentaltransaction_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investmentmetrics',
+            index=models.Index(fields=['-investment_score', 'cap_rate', 'gross_rental_yield'], name='Dashboard_i_investm_0bb2fb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investmentmetrics',
+            index=models.Index(fields=['cap_rate'], name='Dashboard_i_cap_rat_3eb7a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investmentmetrics',
+            index=models.Index(fields=['cash_on_cash_return'], name='Dashboard_i_cash_on_9e158c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investmentmetrics',
+            index=models.Index(fields=['net_operating_income'], name='Dashboard_i_net_ope_7b6be7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['city', 'state', 'current_price'], name='Dashboard_p_city_01affa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['property_type', 'current_price'], name='Dashboard_p_propert_a42d0c_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# icontains compiles to UPPER("col"::text) LIKE UPPER(%s) on PostgreSQL, so the
+# trigram indexes are built on that exact expression for the planner to use.
+TRIGRAM_COLUMNS = ['city', 'state', 'address', 'zip_code']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('Dashboard', 'Property')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS property_{column}_trgm ON "{table}" '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS property_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0009_composite_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:19
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_annualized_return(apps, schema_editor):
+    # annualized_return is NOI / price, which is exactly what cap_rate stores
+    InvestmentMetrics = apps.get_model('Dashboard', 'InvestmentMetrics')
+    InvestmentMetrics.objects.update(annualized_return=F('cap_rate'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0010_property_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investmentmetrics',
+            name='annualized_return',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.RunPython(backfill_annualized_return,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:24
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_cached_metrics(apps, schema_editor):
+    Property = apps.get_model('Dashboard', 'Property')
+    InvestmentMetrics = apps.get_model('Dashboard', 'InvestmentMetrics')
+    metrics = InvestmentMetrics.objects.filter(property_ref=OuterRef('pk'))
+    Property.objects.filter(metrics__isnull=False).update(
+        cached_investment_score=Subquery(
+            metrics.values('investment_score')[:1]),
+        cached_cap_rate=Subquery(metrics.values('cap_rate')[:1]),
+        cached_noi=Subquery(metrics.values('net_operating_income')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0011_investmentmetrics_annualized_return'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='cached_cap_rate',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='cached_investment_score',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='cached_noi',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.RunPython(backfill_cached_metrics,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0012_property_cached_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rentaltransaction',
+            index=models.Index(fields=['owned_property', 'date'], name='Dashboard_r_owned_p_329048_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentaltransaction',
+            index=models.Index(fields=['transaction_type', 'category'], name='Dashboard_r_transac_1e88f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentaltransaction',
+            index=models.Index(condition=models.Q(('receipt_uploaded', True)), fields=['date'], name='rental_txn_receipt_date'),
+        ),
+        migrations.AddIndex(
+            model_name='userownedproperty',
+            index=models.Index(fields=['status', 'user'], name='Dashboard_u_status_11fcb4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userownedproperty',
+            index=models.Index(fields=['custom_state'], name='Dashboard_u_custom__2a1266_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userownedproperty',
+            index=models.Index(condition=models.Q(('status', 'sold'), _negated=True), fields=['purchase_date'], name='owned_held_purchase_dt'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0013_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investmentmetrics',
+            index=models.Index(condition=models.Q(('net_operating_income__gt', 0)), fields=['property_ref'], name='metrics_profitable_noi'),
+        ),
+        migrations.AddIndex(
+            model_name='investmentmetrics',
+            index=models.Index(condition=models.Q(('estimated_profit__gt', 0)), fields=['property_ref'], name='metrics_profitable_profit'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0014_metrics_profitable_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyvaluation',
+            index=models.Index(condition=models.Q(('five_year_roi_percent__isnull', False), ('valuation_successful', True)), fields=['property_ref', '-created_at'], name='pv_latest_ok_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:30
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_latest_ai_roi(apps, schema_editor):
+    Property = apps.get_model('Dashboard', 'Property')
+    PropertyValuation = apps.get_model('Dashboard', 'PropertyValuation')
+    latest = PropertyValuation.objects.filter(
+        property_ref=OuterRef('pk'),
+        valuation_successful=True,
+        five_year_roi_percent__isnull=False
+    ).order_by('-created_at')
+    Property.objects.filter(
+        valuations__valuation_successful=True,
+        valuations__five_year_roi_percent__isnull=False
+    ).distinct().update(
+        latest_ai_roi_percent=Subquery(
+            latest.values('five_year_roi_percent')[:1]),
+        latest_ai_roi_at=Subquery(latest.values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0015_valuation_latest_ok_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='latest_ai_roi_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='latest_ai_roi_percent',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.RunPython(backfill_latest_ai_roi,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0016_property_latest_ai_roi'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investmentmetrics',
+            index=models.Index(fields=['calculated_at'], name='Dashboard_i_calcula_e5c2d7_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:37
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Round
+
+
+def annualize_roi(apps, schema_editor):
+    PropertyValuation = apps.get_model('Dashboard', 'PropertyValuation')
+    Property = apps.get_model('Dashboard', 'Property')
+    PropertyValuation.objects.filter(
+        five_year_roi_percent__isnull=False
+    ).update(annual_roi_percent=Round(F('five_year_roi_percent') / 5, 2))
+    # Property.latest_ai_roi_percent now holds the annualized figure
+    Property.objects.filter(latest_ai_roi_percent__isnull=False).update(
+        latest_ai_roi_percent=Round(F('latest_ai_roi_percent') / 5, 2))
+
+
+def restore_five_year_roi(apps, schema_editor):
+    Property = apps.get_model('Dashboard', 'Property')
+    Property.objects.filter(latest_ai_roi_percent__isnull=False).update(
+        latest_ai_roi_percent=F('latest_ai_roi_percent') * 5)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0017_metrics_calculated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyvaluation',
+            name='annual_roi_percent',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.RunPython(annualize_roi, restore_five_year_roi),
+    ]
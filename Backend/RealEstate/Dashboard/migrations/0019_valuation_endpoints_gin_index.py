@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+# Serves attom_endpoints_used__contains=[...] lookups. jsonb_path_ops only
+# supports containment, which is all the analytics need, and is smaller
+# than the default jsonb_ops.
+def create_endpoints_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('Dashboard', 'PropertyValuation')._meta.db_table
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS pv_endpoints_gin ON "{table}" '
+        f'USING gin ("attom_endpoints_used" jsonb_path_ops)'
+    )
+
+
+def drop_endpoints_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS pv_endpoints_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0018_valuation_annual_roi'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_endpoints_gin_index,
+                             drop_endpoints_gin_index),
+    ]
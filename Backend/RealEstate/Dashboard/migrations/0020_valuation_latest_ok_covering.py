@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# Rebuild pv_latest_ok_idx as a covering index on PostgreSQL so the
+# latest-ROI lookup in the PropertyValuation post_delete signal is answered
+# from the index alone. Django's Index(include=...) would warn on SQLite,
+# which doesn't support non-key columns, so this stays PostgreSQL-only.
+def add_covering_columns(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('Dashboard', 'PropertyValuation')._meta.db_table
+    schema_editor.execute('DROP INDEX IF EXISTS pv_latest_ok_idx')
+    schema_editor.execute(
+        f'CREATE INDEX pv_latest_ok_idx ON "{table}" '
+        f'("property_ref_id", "created_at" DESC) '
+        f'INCLUDE ("annual_roi_percent") '
+        f'WHERE "valuation_successful" AND "five_year_roi_percent" IS NOT NULL'
+    )
+
+
+def drop_covering_columns(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('Dashboard', 'PropertyValuation')._meta.db_table
+    schema_editor.execute('DROP INDEX IF EXISTS pv_latest_ok_idx')
+    schema_editor.execute(
+        f'CREATE INDEX pv_latest_ok_idx ON "{table}" '
+        f'("property_ref_id", "created_at" DESC) '
+        f'WHERE "valuation_successful" AND "five_year_roi_percent" IS NOT NULL'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0019_valuation_endpoints_gin_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_covering_columns, drop_covering_columns),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:44
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_loan_schedule(apps, schema_editor):
+    UserOwnedProperty = apps.get_model('Dashboard', 'UserOwnedProperty')
+    owned = UserOwnedProperty.objects.filter(
+        loan_amount__gt=0, interest_rate__gt=0, loan_term_years__gt=0)
+    for prop in owned.only('loan_amount', 'interest_rate', 'loan_term_years'):
+        monthly_rate = float(prop.interest_rate) / 100 / 12
+        full_term = (1 + monthly_rate) ** (prop.loan_term_years * 12)
+        payment = float(prop.loan_amount) * monthly_rate * full_term / (
+            full_term - 1)
+        prop.monthly_payment = Decimal(f"{payment:.2f}")
+        prop.amortization_factor = full_term
+        prop.save(update_fields=['monthly_payment', 'amortization_factor'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0020_valuation_latest_ok_covering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userownedproperty',
+            name='amortization_factor',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userownedproperty',
+            name='monthly_payment',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.RunPython(backfill_loan_schedule,
+                             migrations.RunPython.noop),
+    ]
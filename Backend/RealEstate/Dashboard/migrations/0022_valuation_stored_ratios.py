@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:49
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def _percent_of_value(amount, value):
+    # Frozen copy of PropertyValuation.percent_of_value
+    if not amount or not value:
+        return None
+    return (Decimal(str(amount)) / Decimal(str(value)) * 100).quantize(
+        Decimal('0.01'))
+
+
+def fill_ratios(apps, schema_editor):
+    PropertyValuation = apps.get_model('Dashboard', 'PropertyValuation')
+    valuations = PropertyValuation.objects.filter(
+        fair_market_value__isnull=False).only(
+        'id', 'fair_market_value', 'monthly_gross_rent', 'annual_noi')
+    batch = []
+    for valuation in valuations.iterator(chunk_size=1000):
+        valuation.gross_rental_yield = _percent_of_value(
+            valuation.monthly_gross_rent and valuation.monthly_gross_rent * 12,
+            valuation.fair_market_value)
+        valuation.cap_rate = _percent_of_value(
+            valuation.annual_noi, valuation.fair_market_value)
+        batch.append(valuation)
+        if len(batch) == 1000:
+            PropertyValuation.objects.bulk_update(
+                batch, ['gross_rental_yield', 'cap_rate'])
+            batch = []
+    PropertyValuation.objects.bulk_update(
+        batch, ['gross_rental_yield', 'cap_rate'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0021_owned_loan_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyvaluation',
+            name='cap_rate',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyvaluation',
+            name='gross_rental_yield',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(fill_ratios, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0022_valuation_stored_ratios'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='rentaltransaction',
+            name='Dashboard_r_owned_p_329048_idx',
+        ),
+        migrations.AddIndex(
+            model_name='rentaltransaction',
+            index=models.Index(fields=['owned_property', 'date', 'transaction_type', 'amount'], name='Dashboard_r_owned_p_0bf616_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 04:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dashboard', '0023_transaction_cashflow_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='property',
+            name='Dashboard_p_city_27fea5_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='Dashboard_p_propert_597902_idx',
+        ),
+    ]
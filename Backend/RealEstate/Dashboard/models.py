@@ -1,6 +1,156 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import (
+    Cast, Coalesce, Greatest, Least, Now, NullIf, Round, TruncDate)
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import cached_property
+from datetime import date, timedelta
 from decimal import Decimal
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _to_decimal(value, places=2):
+    """Quantize a float metric for a DecimalField (NaN becomes None)"""
+    # NaN is the only value unequal to itself; np.isnan on a Python float
+    # costs as much as the formatting
+    if value != value:
+        return None
+    return Decimal(f"{value:.{places}f}")
+
+
+def _to_decimals(values, places=2):
+    """_to_decimal for a whole float64 array, returned as a list"""
+    # tolist() yields Python floats, which format faster than NumPy scalars
+    return [None if value != value else Decimal(f"{value:.{places}f}")
+            for value in values.tolist()]
+
+
+def _as_decimal(value):
+    """Decimal for a numeric value; only floats and strings go through str"""
+    if isinstance(value, Decimal):
+        return value
+    # ints (whole prices, sizes) convert exactly without the str round trip
+    return Decimal(value) if isinstance(value, int) else Decimal(str(value))
+
+
+# Operating expenses are estimated at 30% of rental income, so NOI keeps 70%
+_EXPENSE_RATIO = 0.30
+_NOI_RATIO = 1 - _EXPENSE_RATIO
+
+_CENTS = Decimal('0.01')
+
+
+def _bulk_update(model, objs, fields, batch_size=1000):
+    """
+    bulk_update that joins against a VALUES list on PostgreSQL.
+
+    Django's bulk_update writes a CASE WHEN per column and row, which is slow
+    to build and to plan for large batches; UPDATE ... FROM (VALUES ...) sets
+    every column from a single join instead. Other databases use bulk_update.
+    """
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_update(objs, fields=fields, batch_size=batch_size)
+        return
+    meta = model._meta
+    columns = [meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    # Cast every placeholder so NULLs and numerics keep the column types
+    placeholder = '(%s)' % ', '.join(
+        [f'%s::{meta.pk.rel_db_type(connection)}'] +
+        [f'%s::{field.db_type(connection)}' for field in columns])
+    assignments = ', '.join(
+        f'{quote(field.column)} = v.{quote(field.column)}'
+        for field in columns)
+    aliases = ', '.join(
+        quote(field.column) for field in [meta.pk, *columns])
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start:start + batch_size]
+            params = []
+            for obj in batch:
+                params.append(obj.pk)
+                params.extend(field.get_db_prep_save(
+                    getattr(obj, field.attname), connection)
+                    for field in columns)
+            cursor.execute(
+                f'UPDATE {quote(meta.db_table)} AS t SET {assignments} '
+                f'FROM (VALUES {", ".join([placeholder] * len(batch))}) '
+                f'AS v({aliases}) '
+                f'WHERE t.{quote(meta.pk.column)} = v.{quote(meta.pk.column)}',
+                params)
+
+
+def _remaining_balance(loan, monthly_rate, total_payments, months_elapsed,
+                       full_term=None):
+    """
+    Balance left on a fully amortizing loan after months_elapsed payments.
+
+    full_term is (1 + monthly_rate) ** total_payments when already known.
+    """
+    if months_elapsed >= total_payments:
+        return 0.0
+    if monthly_rate == 0:
+        return loan * (1 - months_elapsed / total_payments)
+    growth = 1 + monthly_rate
+    if full_term is None:
+        full_term = growth ** total_payments
+    return loan * (full_term - growth ** months_elapsed) / (full_term - 1)
+
+
+def _remaining_balances(loan, monthly_rate, total_payments, months_elapsed,
+                        full_term):
+    """_remaining_balance over float64 arrays; NaN full_term is computed"""
+    growth = 1 + monthly_rate
+    full_term = np.where(np.isnan(full_term), growth ** total_payments,
+                         full_term)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = np.where(
+            monthly_rate == 0,
+            loan * (1 - months_elapsed / total_payments),
+            loan * (full_term - growth ** months_elapsed) / (full_term - 1))
+    return np.where(months_elapsed >= total_payments, 0.0, balance)
+
+
+def _months_elapsed(purchase_date, today):
+    """Whole calendar months from purchase_date to today"""
+    return (today.year - purchase_date.year) * 12 + \
+        (today.month - purchase_date.month)
+
+
+def _score_batch(cap_rate, noi, price, profit, price_to_rent):
+    """
+    investment_score and risk_score over float64 arrays, with the weights
+    InvestmentMetrics.calculate_metrics uses. A NaN or zero profit
+    contributes 0; other NaN inputs propagate to the score.
+    """
+    risk = np.clip(price_to_rent / 10, 1, 10)
+    has_profit = ~np.isnan(profit) & (profit != 0)
+    with np.errstate(invalid='ignore'):
+        appreciation = np.clip(
+            np.where(has_profit, profit, 0.0) / price * 200, 0, 100)
+    score = np.clip(cap_rate * 10, 0, 100) * 0.4
+    score += np.clip(noi / 12 / 100, 0, 100) * 0.25
+    score += appreciation * 0.2
+    score += np.clip(200 - price_to_rent * 10, 0, 100) * 0.1
+    score += (10 - risk) * 10 * 0.05
+    return score, risk
+
+
+_predictor = None
+
+
+def _get_predictor():
+    """Shared OpenAIProfitPredictor, built on first use"""
+    global _predictor
+    if _predictor is None:
+        # services imports this module, so import lazily
+        from .services import OpenAIProfitPredictor
+        _predictor = OpenAIProfitPredictor()
+    return _predictor
 
 
 class Property(models.Model):
@@ -44,27 +194,86 @@ class Property(models.Model):
     days_on_market = models.IntegerField(null=True, blank=True)
 
     # External API references
+    # A plain unique index rather than a partial one (WHERE attom_id IS NOT
+    # NULL): bulk_ingest's ON CONFLICT (attom_id) only matches a partial
+    # index when the conflict target repeats its predicate, which Django
+    # doesn't emit
     attom_id = models.CharField(
         max_length=100, null=True, blank=True, unique=True)
     zillow_id = models.CharField(max_length=100, null=True, blank=True)
     mls_id = models.CharField(max_length=100, null=True, blank=True)
 
+    # Newest successful AI valuation ROI (annualized), kept current by a
+    # post_save signal on PropertyValuation so metrics don't have to query it
+    latest_ai_roi_percent = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True)  # annual %
+    latest_ai_roi_at = models.DateTimeField(null=True, blank=True)
+
+    # Copies of InvestmentMetrics columns, kept in sync when metrics are
+    # recalculated, so range filters and ordering don't need the JOIN
+    cached_investment_score = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True, db_index=True)
+    cached_cap_rate = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True, db_index=True)
+    cached_noi = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True, db_index=True)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     last_api_sync = models.DateTimeField(null=True, blank=True)
 
+    # Columns refreshed when bulk_ingest hits an existing attom_id
+    INGEST_UPDATE_FIELDS = [
+        'address', 'city', 'state', 'zip_code', 'latitude', 'longitude',
+        'property_type', 'bedrooms', 'bathrooms', 'square_feet', 'lot_size',
+        'year_built', 'current_price', 'estimated_value', 'tax_assessment',
+        'annual_taxes', 'estimated_rent', 'last_api_sync', 'updated_at',
+    ]
+
     class Meta:
         indexes = [
-            models.Index(fields=['city', 'state']),
-            models.Index(fields=['property_type']),
             models.Index(fields=['current_price']),
             models.Index(fields=['estimated_rent']),
+            # Location + price range filters served by a single index; its
+            # (city, state) prefix also serves plain location lookups
+            models.Index(fields=['city', 'state', 'current_price']),
+            models.Index(fields=['property_type', 'current_price']),
         ]
 
     def __str__(self):
         return f"{self.address}, {self.city}, {self.state}"
 
+    @classmethod
+    def bulk_ingest(cls, records, predict_profit=True):
+        """
+        Upsert property field dicts on attom_id and compute their metrics.
+
+        Properties are written with one bulk_create, missing metrics rows are
+        inserted in bulk and all metrics are computed by
+        InvestmentMetrics.recompute_all. Records must carry an attom_id and
+        should be unique on it within one call. Returns the number of records.
+        """
+        records = list(records)
+        if not records:
+            return 0
+        # bulk_create only fills auto_now on insert, and cached AI profit
+        # predictions are keyed on updated_at, so stamp refreshed rows too
+        now = timezone.now()
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [cls(**{**record, 'updated_at': now}) for record in records],
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['attom_id'],
+                update_fields=cls.INGEST_UPDATE_FIELDS,
+            )
+            ingested = cls.objects.filter(
+                attom_id__in=[record['attom_id'] for record in records])
+            InvestmentMetrics.create_missing(ingested)
+        InvestmentMetrics.recompute_all(ingested, predict_profit=predict_profit)
+        return len(records)
+
 
 class InvestmentMetrics(models.Model):
     """Calculated investment metrics for each property"""
@@ -82,6 +291,9 @@ class InvestmentMetrics(models.Model):
         max_digits=5, decimal_places=2, null=True, blank=True)  # %
     roi = models.DecimalField(
         max_digits=5, decimal_places=2, null=True, blank=True)  # % ROI
+    # NOI / current price, stored so ROI filters and ordering stay in SQL
+    annualized_return = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True, db_index=True)  # %
 
     # Profitability metrics
     estimated_profit = models.DecimalField(
@@ -102,34 +314,72 @@ class InvestmentMetrics(models.Model):
     # Calculation metadata
     calculated_at = models.DateTimeField(auto_now=True)
 
-    @property
-    def annualized_return(self):
-        """Calculate annualized return percentage"""
-        if self.net_operating_income and self.property_ref.current_price:
-            return (self.net_operating_income / self.property_ref.current_price) * 100
-        return None
+    # Columns written by calculate_metrics and recompute_all
+    METRIC_FIELDS = [
+        'gross_rental_yield', 'net_operating_income', 'cap_rate',
+        'annualized_return', 'price_to_rent_ratio', 'roi',
+        'estimated_profit', 'risk_score', 'investment_score',
+        'calculated_at'
+    ]
 
-    def calculate_metrics(self):
-        """Calculate all investment metrics for this property"""
-        if not self.property_ref.current_price or not self.property_ref.estimated_rent:
-            return
+    # AI profit predictions are cached per property version this long
+    PROFIT_CACHE_TIMEOUT = 3600
+
+    class Meta:
+        indexes = [
+            # Top-N by investment score, carrying the columns shown alongside it
+            models.Index(fields=['-investment_score', 'cap_rate',
+                                 'gross_rental_yield']),
+            models.Index(fields=['cap_rate']),
+            models.Index(fields=['cash_on_cash_return']),
+            models.Index(fields=['net_operating_income']),
+            # Admin list_filter / date drill-down
+            models.Index(fields=['calculated_at']),
+            # Profitable-property EXISTS checks in PropertyFilter
+            models.Index(fields=['property_ref'],
+                         condition=models.Q(net_operating_income__gt=0),
+                         name='metrics_profitable_noi'),
+            models.Index(fields=['property_ref'],
+                         condition=models.Q(estimated_profit__gt=0),
+                         name='metrics_profitable_profit'),
+        ]
 
-        annual_rent = self.property_ref.estimated_rent * 12
+    def calculate_metrics(self, *, persist=True, ai_profit=None):
+        """
+        Calculate all investment metrics for this property.
+
+        Pass ai_profit to reuse a prediction fetched in bulk instead of calling
+        OpenAI per row, and persist=False to skip the save so callers can
+        write a batch with bulk_save.
+        """
+        prop = self.property_ref
+        price = prop.current_price
+        rent = prop.estimated_rent
+        if not price or not rent:
+            return self
+
+        # Ratios and scores only need float precision; fields are quantized
+        # to Decimal once on assignment
+        price_f = float(price)
+        annual_rent = float(rent) * 12
 
         # Gross Rental Yield
-        self.gross_rental_yield = (
-            annual_rent / self.property_ref.current_price) * 100
+        gross_rental_yield = annual_rent / price_f * 100
 
         # Estimate operating expenses (30% of rental income is a common rule)
-        operating_expenses = annual_rent * Decimal('0.30')
-        self.net_operating_income = annual_rent - operating_expenses
+        net_operating_income = annual_rent * _NOI_RATIO
 
         # Cap Rate
-        self.cap_rate = (self.net_operating_income /
-                         self.property_ref.current_price) * 100
+        cap_rate = net_operating_income / price_f * 100
 
         # Price to Rent Ratio
-        self.price_to_rent_ratio = self.property_ref.current_price / annual_rent
+        price_to_rent_ratio = price_f / annual_rent
+
+        self.gross_rental_yield = _to_decimal(gross_rental_yield)
+        self.net_operating_income = _to_decimal(net_operating_income)
+        self.cap_rate = _to_decimal(cap_rate)
+        self.annualized_return = self.cap_rate
+        self.price_to_rent_ratio = _to_decimal(price_to_rent_ratio)
 
         # ROI Calculation - Use AI valuation ROI if available, otherwise calculate basic ROI
         ai_roi = self._get_ai_valuation_roi()
@@ -138,109 +388,314 @@ class InvestmentMetrics(models.Model):
         else:
             # Calculate basic ROI: (Annual NOI / Purchase Price) * 100
             # This gives annual return on investment
-            if self.net_operating_income and self.property_ref.current_price:
-                self.roi = (self.net_operating_income /
-                            self.property_ref.current_price) * 100
+            self.roi = self.cap_rate
 
         # Estimated Profit - Try OpenAI prediction first, fallback to simple calculation
-        ai_predicted_profit = self._get_ai_predicted_profit()
-        if ai_predicted_profit is not None:
-            self.estimated_profit = ai_predicted_profit
-        elif self.property_ref.estimated_value and self.property_ref.current_price:
+        if ai_profit is None:
+            ai_profit = self._get_ai_predicted_profit()
+        estimated_value = prop.estimated_value
+        if ai_profit is not None:
+            estimated_profit = float(ai_profit)
+        elif estimated_value:
             # Fallback to simple calculation
-            self.estimated_profit = self.property_ref.estimated_value - \
-                self.property_ref.current_price
+            estimated_profit = float(estimated_value) - price_f
+        elif self.estimated_profit is not None:
+            # Keep the previous figure when there is nothing newer
+            estimated_profit = float(self.estimated_profit)
+        else:
+            estimated_profit = None
+        if estimated_profit is not None:
+            self.estimated_profit = _to_decimal(estimated_profit)
 
         # Simple risk score (lower price-to-rent ratio = lower risk)
-        if self.price_to_rent_ratio:
-            self.risk_score = min(
-                10, max(1, float(self.price_to_rent_ratio) / 10))
+        risk_score = min(10, max(1, price_to_rent_ratio / 10))
+        self.risk_score = _to_decimal(risk_score, 1)
 
         # Investment Score (sophisticated real estate investment scoring)
         score_components = {}
 
         # Cap Rate Component (Weight: 40%)
-        if self.cap_rate:
-            # 10% cap rate = 100 points
-            cap_rate_score = min(100, max(0, float(self.cap_rate) * 10))
-            score_components['cap_rate'] = cap_rate_score * 0.4
+        # 10% cap rate = 100 points
+        cap_rate_score = min(100, max(0, cap_rate * 10))
+        score_components['cap_rate'] = cap_rate_score * 0.4
 
         # Cash Flow Component (Weight: 25%)
-        if self.net_operating_income and self.property_ref.current_price:
-            monthly_noi = float(self.net_operating_income) / 12
-            # Score based on positive monthly cash flow
-            # $100/month = 1 point
-            cashflow_score = min(100, max(0, monthly_noi / 100))
-            score_components['cashflow'] = cashflow_score * 0.25
+        monthly_noi = net_operating_income / 12
+        # Score based on positive monthly cash flow
+        # $100/month = 1 point
+        cashflow_score = min(100, max(0, monthly_noi / 100))
+        score_components['cashflow'] = cashflow_score * 0.25
 
         # Appreciation Potential (Weight: 20%) - Based on estimated profit
-        if self.estimated_profit and self.property_ref.current_price:
-            profit_percentage = (
-                float(self.estimated_profit) / float(self.property_ref.current_price)) * 100
+        if estimated_profit:
+            profit_percentage = estimated_profit / price_f * 100
             # 50% profit = 100 points
             appreciation_score = min(100, max(0, profit_percentage * 2))
             score_components['appreciation'] = appreciation_score * 0.2
 
         # Market Efficiency (Weight: 10%)
-        if self.price_to_rent_ratio:
-            # Lower ratio = better deal
-            # Ratio of 15 = 50 points
-            efficiency_score = min(
-                100, max(0, 200 - float(self.price_to_rent_ratio) * 10))
-            score_components['efficiency'] = efficiency_score * 0.1
+        # Lower ratio = better deal
+        # Ratio of 15 = 50 points
+        efficiency_score = min(100, max(0, 200 - price_to_rent_ratio * 10))
+        score_components['efficiency'] = efficiency_score * 0.1
 
         # Risk Adjustment (Weight: 5%)
-        if self.risk_score:
-            risk_adjustment = (10 - float(self.risk_score)) * \
-                10  # Lower risk = higher score
-            score_components['risk'] = risk_adjustment * 0.05
+        risk_adjustment = (10 - risk_score) * 10  # Lower risk = higher score
+        score_components['risk'] = risk_adjustment * 0.05
 
         # Calculate final weighted score
-        if score_components:
-            self.investment_score = sum(score_components.values())
-        else:
-            self.investment_score = 0
+        self.investment_score = _to_decimal(sum(score_components.values()))
+
+        if persist:
+            self.save(update_fields=self.METRIC_FIELDS)
+            Property.objects.filter(pk=self.property_ref_id).update(
+                cached_investment_score=self.investment_score,
+                cached_cap_rate=self.cap_rate,
+                cached_noi=self.net_operating_income,
+            )
+        return self
+
+    @staticmethod
+    def profit_cache_key(property_id, updated_at):
+        return f"im:{property_id}:{updated_at.timestamp()}:profit"
+
+    @classmethod
+    def create_missing(cls, queryset):
+        """Insert empty metrics rows for properties in queryset lacking one"""
+        cls.objects.bulk_create(
+            [cls(property_ref_id=pk) for pk in queryset.filter(
+                metrics__isnull=True).values_list('id', flat=True)],
+            ignore_conflicts=True,
+        )
 
-        self.save()
+    @classmethod
+    def recompute_all(cls, queryset, predict_profit=True, chunk_size=2000):
+        """
+        Recalculate metrics for every property in queryset with NumPy.
+
+        Mirrors calculate_metrics but computes whole columns at once and writes
+        them back with bulk_update. Properties are read in primary key order,
+        chunk_size at a time, and each chunk is written before the next is
+        fetched, so memory stays flat however large the catalog is. Unless
+        predict_profit is False, AI profit predictions come from the cache or
+        are fetched per chunk through OpenAIProfitPredictor.predict_batch.
+        Properties without metrics, price or rent are skipped. Returns the
+        number of rows updated.
+        """
+        def as_float(name):
+            return Cast(name, models.FloatField())
+
+        # Money columns arrive as floats, so no Decimal is built per value
+        rows_qs = queryset.filter(
+            metrics__isnull=False,
+            current_price__gt=0,
+            estimated_rent__gt=0
+        ).order_by('pk').values_list(
+            'id', 'metrics__id', as_float('current_price'),
+            as_float('estimated_rent'), as_float('estimated_value'),
+            as_float('metrics__estimated_profit'),
+            as_float('latest_ai_roi_percent'), 'updated_at'
+        )
+        updated = 0
+        last_pk = 0
+        while True:
+            # Keyset pagination keeps no cursor open across the writes
+            rows = list(rows_qs.filter(pk__gt=last_pk)[:chunk_size])
+            if not rows:
+                return updated
+            updated += cls._recompute_rows(rows, predict_profit)
+            last_pk = rows[-1][0]
+
+    @classmethod
+    def _recompute_rows(cls, rows, predict_profit):
+        """Compute and write one chunk of recompute_all's values_list rows"""
+        property_ids = [row[0] for row in rows]
+        ids = [row[1] for row in rows]
+        ai_profits = cls._predict_profits(
+            {row[0]: row[7] for row in rows}) if predict_profit else {}
+        # None becomes NaN in a float64 array
+        price, rent, value, prev_profit, ai_roi = np.array(
+            [row[2:7] for row in rows], dtype=np.float64).T
+        ai_profit = np.array([ai_profits.get(pk) for pk in property_ids],
+                             dtype=np.float64)
+
+        annual_rent = rent * 12
+        gross_rental_yield = annual_rent / price * 100
+        noi = annual_rent * _NOI_RATIO
+        cap_rate = noi / price * 100
+        price_to_rent = price / annual_rent
+        has_ai_roi = ~np.isnan(ai_roi) & (ai_roi != 0)
+        roi = np.where(has_ai_roi, ai_roi, cap_rate)
+        # A zero estimated_value counts as missing, as in calculate_metrics
+        has_value = ~np.isnan(value) & (value != 0)
+        profit = np.where(~np.isnan(ai_profit), ai_profit,
+                          np.where(has_value, value - price, prev_profit))
+        investment_score, risk = _score_batch(
+            cap_rate, noi, price, profit, price_to_rent)
+
+        # Quantize whole columns once at the boundary
+        columns = zip(
+            ids, property_ids, _to_decimals(gross_rental_yield),
+            _to_decimals(noi), _to_decimals(cap_rate),
+            _to_decimals(price_to_rent), _to_decimals(roi),
+            _to_decimals(profit), _to_decimals(risk, 1),
+            _to_decimals(investment_score),
+        )
+        objs = [
+            cls(
+                id=metrics_id,
+                property_ref_id=property_id,
+                gross_rental_yield=yield_d,
+                net_operating_income=noi_d,
+                cap_rate=cap_rate_d,
+                annualized_return=cap_rate_d,
+                price_to_rent_ratio=price_to_rent_d,
+                roi=roi_d,
+                estimated_profit=profit_d,
+                risk_score=risk_d,
+                investment_score=score_d,
+            )
+            for (metrics_id, property_id, yield_d, noi_d, cap_rate_d,
+                 price_to_rent_d, roi_d, profit_d, risk_d, score_d) in columns
+        ]
 
-    def _get_ai_predicted_profit(self):
-        """Get AI-predicted profit using OpenAI service"""
+        cls.bulk_save(objs)
+        return len(objs)
+
+    @classmethod
+    def recompute_scores_sql(cls):
+        """
+        Recompute investment_score for every row in a single UPDATE.
+
+        Uses the stored (rounded) metric columns with the calculate_metrics
+        weights, so scores can differ from a full recalculation by a few
+        hundredths. Only rows with computed metrics are touched. Returns the
+        number of rows updated.
+        """
+        def column(name):
+            return Cast(name, models.FloatField())
+
+        def clamp(expression):
+            return Greatest(models.Value(0.0),
+                            Least(models.Value(100.0), expression))
+
+        # NULL for zero prices, matching the Python path that skips them.
+        # The ratio is coalesced before clamping: PostgreSQL's GREATEST and
+        # LEAST ignore NULLs while SQLite's return NULL
+        price = NullIf(Cast(Property.objects.filter(
+            pk=models.OuterRef('property_ref')).values('current_price')[:1],
+            models.FloatField()), models.Value(0.0))
+        appreciation = models.Case(
+            models.When(models.Q(estimated_profit__isnull=False) &
+                        ~models.Q(estimated_profit=0),
+                        then=clamp(Coalesce(
+                            column('estimated_profit') / price * 200,
+                            models.Value(0.0)))),
+            default=models.Value(0.0),
+        )
+        score = (
+            clamp(column('cap_rate') * 10) * 0.4
+            + clamp(column('net_operating_income') / 12 / 100) * 0.25
+            + appreciation * 0.2
+            + clamp(200 - column('price_to_rent_ratio') * 10) * 0.1
+            + (10 - column('risk_score')) * 10 * 0.05
+        )
+
+        with transaction.atomic():
+            updated = cls.objects.filter(
+                cap_rate__isnull=False,
+                net_operating_income__isnull=False,
+                price_to_rent_ratio__isnull=False,
+                risk_score__isnull=False,
+            ).update(investment_score=Round(score, 2))
+            Property.objects.filter(metrics__isnull=False).update(
+                cached_investment_score=cls.objects.filter(
+                    property_ref=models.OuterRef('pk')
+                ).values('investment_score')[:1])
+        return updated
+
+    @classmethod
+    def bulk_save(cls, metrics_list):
+        """
+        Write metrics computed with calculate_metrics(persist=False) in batches.
+
+        Only METRIC_FIELDS are updated, and the copies on Property are
+        refreshed the same way calculate_metrics does for a single row.
+        """
+        # bulk_update skips auto_now, so stamp the rows explicitly
+        now = timezone.now()
+        for metrics in metrics_list:
+            metrics.calculated_at = now
+
+        _bulk_update(cls, metrics_list, cls.METRIC_FIELDS)
+        _bulk_update(Property, [
+            Property(
+                id=metrics.property_ref_id,
+                cached_investment_score=metrics.investment_score,
+                cached_cap_rate=metrics.cap_rate,
+                cached_noi=metrics.net_operating_income,
+            )
+            for metrics in metrics_list
+        ], ['cached_investment_score', 'cached_cap_rate', 'cached_noi'])
+
+    @classmethod
+    def _predict_profits(cls, versions):
+        """
+        AI profit predictions for a {property_id: updated_at} map. Cached
+        predictions are reused, the rest are fetched in one batch.
+        """
+        keys = {cls.profit_cache_key(pk, updated_at): pk
+                for pk, updated_at in versions.items()}
+        cached = cache.get_many(keys)
+        profits = {keys[key]: profit for key, profit in cached.items()}
+        missing = [pk for key, pk in keys.items() if key not in cached]
+        if not missing:
+            return profits
         try:
-            from .services import OpenAIProfitPredictor
-            predictor = OpenAIProfitPredictor()
-            return predictor.predict_potential_profit(self.property_ref)
+            predictor = _get_predictor()
+            fetched = predictor.predict_batch(list(
+                Property.objects.filter(pk__in=missing)
+                .only(*predictor.PROPERTY_FIELDS)))
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Could not get AI profit prediction: {e}")
-            return None
+            logger.warning(f"Could not get AI profit predictions: {e}")
+            return profits
+        # Failed predictions stay uncached so the next run retries them
+        cache.set_many({
+            cls.profit_cache_key(pk, versions[pk]): profit
+            for pk, profit in fetched.items() if profit is not None
+        }, cls.PROFIT_CACHE_TIMEOUT)
+        profits.update(fetched)
+        return profits
+
+    @classmethod
+    def apply_profit_predictions(cls, predictions):
+        """
+        Recompute metrics with AI profits gathered out of band, such as from
+        OpenAIProfitPredictor.collect_batch. Predictions are cached for the
+        properties' current versions first, so no live request is made.
+        Returns the number of metrics rows updated.
+        """
+        versions = dict(Property.objects.filter(
+            pk__in=predictions).values_list('pk', 'updated_at'))
+        cache.set_many({
+            cls.profit_cache_key(pk, updated_at): predictions[pk]
+            for pk, updated_at in versions.items()
+        }, cls.PROFIT_CACHE_TIMEOUT)
+        return cls.recompute_all(Property.objects.filter(pk__in=versions))
+
+    def _get_ai_predicted_profit(self):
+        """Get AI-predicted profit using OpenAI service"""
+        prop = self.property_ref
+        return self._predict_profits({prop.pk: prop.updated_at}).get(prop.pk)
 
     def _get_ai_valuation_roi(self):
         """Get the most recent AI-generated ROI from PropertyValuation records"""
-        try:
-            # Get the most recent successful AI valuation for this property
-            latest_valuation = self.property_ref.valuations.filter(
-                valuation_successful=True,
-                five_year_roi_percent__isnull=False
-            ).order_by('-created_at').first()
-
-            if latest_valuation and latest_valuation.five_year_roi_percent:
-                # Convert 5-year ROI to annual ROI estimate
-                # Simple approximation: divide by 5 for annual average
-                annual_roi = float(latest_valuation.five_year_roi_percent) / 5
-
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.info(
-                    f"Using AI ROI for {self.property_ref.address}: {annual_roi}% (from 5-year: {latest_valuation.five_year_roi_percent}%)")
-
-                return Decimal(str(annual_roi))
-
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Could not get AI valuation ROI: {e}")
-
+        # Already annualized when the valuation was saved
+        annual_roi = self.property_ref.latest_ai_roi_percent
+        if annual_roi:
+            logger.info(
+                f"Using AI ROI for {self.property_ref.address}: {annual_roi}%")
+            return annual_roi
         return None
 
     def __str__(self):
@@ -304,6 +759,9 @@ class PropertyValuation(models.Model):
         max_digits=12, decimal_places=2, null=True, blank=True)
     five_year_roi_percent = models.DecimalField(
         max_digits=6, decimal_places=2, null=True, blank=True)
+    # five_year_roi_percent / 5, filled in by save()
+    annual_roi_percent = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True, db_index=True)
 
     # Detailed assumptions and projections
     monthly_gross_rent = models.DecimalField(
@@ -313,6 +771,12 @@ class PropertyValuation(models.Model):
     annual_appreciation_rate = models.DecimalField(
         max_digits=5, decimal_places=2, null=True, blank=True)
 
+    # Ratios of the AI estimates to fair_market_value, filled in by save()
+    gross_rental_yield = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True)  # %
+    cap_rate = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True)  # %
+
     # AI analysis text
     investment_recommendation = models.CharField(
         max_length=500, blank=True)  # Strong Buy/Buy/Hold/Pass
@@ -325,7 +789,8 @@ class PropertyValuation(models.Model):
     error_message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
-    # ATTOM API endpoints used for this valuation
+    # ATTOM API endpoints used for this valuation (GIN-indexed for
+    # __contains lookups on PostgreSQL, see 0019)
     attom_endpoints_used = models.JSONField(default=list, blank=True)
 
     class Meta:
@@ -334,22 +799,50 @@ class PropertyValuation(models.Model):
             models.Index(fields=['property_ref', '-created_at']),
             models.Index(fields=['valuation_successful']),
             models.Index(fields=['fair_market_value']),
+            # Latest usable AI ROI per property. Migration 0020 rebuilds it
+            # in raw SQL with INCLUDE (annual_roi_percent) on PostgreSQL,
+            # which this declaration doesn't carry: a migration that alters
+            # or recreates this index must re-add the INCLUDE column by hand
+            models.Index(fields=['property_ref', '-created_at'],
+                         condition=models.Q(valuation_successful=True,
+                                            five_year_roi_percent__isnull=False),
+                         name='pv_latest_ok_idx'),
         ]
 
-    @property
-    def gross_rental_yield(self):
-        """Calculate gross rental yield based on AI estimates"""
-        if self.monthly_gross_rent and self.fair_market_value:
-            annual_rent = self.monthly_gross_rent * 12
-            return (annual_rent / self.fair_market_value) * 100
-        return None
+    # Stored columns save() derives, and the fields each is derived from
+    DERIVED_FIELDS = {
+        'annual_roi_percent': {'five_year_roi_percent'},
+        'gross_rental_yield': {'monthly_gross_rent', 'fair_market_value'},
+        'cap_rate': {'annual_noi', 'fair_market_value'},
+    }
+
+    @staticmethod
+    def annualize_roi(five_year_roi):
+        """Linear annual average of a 5-year ROI percentage"""
+        if five_year_roi is None:
+            return None
+        return (_as_decimal(five_year_roi) / 5).quantize(_CENTS)
 
-    @property
-    def cap_rate(self):
-        """Calculate cap rate based on AI estimates"""
-        if self.annual_noi and self.fair_market_value:
-            return (self.annual_noi / self.fair_market_value) * 100
-        return None
+    @staticmethod
+    def percent_of_value(amount, value):
+        """amount as a percentage of value, or None when either is missing"""
+        if not amount or not value:
+            return None
+        return (_as_decimal(amount) / _as_decimal(value) * 100).quantize(_CENTS)
+
+    def save(self, *args, **kwargs):
+        self.annual_roi_percent = self.annualize_roi(self.five_year_roi_percent)
+        self.gross_rental_yield = self.percent_of_value(
+            self.monthly_gross_rent and self.monthly_gross_rent * 12,
+            self.fair_market_value)
+        self.cap_rate = self.percent_of_value(
+            self.annual_noi, self.fair_market_value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *(
+                field for field, inputs in self.DERIVED_FIELDS.items()
+                if inputs.intersection(update_fields))}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         status = "✓" if self.valuation_successful else "✗"
@@ -377,6 +870,21 @@ class DealStage(models.Model):
         return self.display_name
 
 
+class DealQuerySet(models.QuerySet):
+    """Query helpers shared by the deal pipeline views"""
+
+    def for_board(self):
+        """Join everything a Kanban card renders in the same query"""
+        return self.select_related(
+            'stage', 'property_ref', 'assigned_to', 'created_by')
+
+    def with_days_in_stage(self):
+        """Annotate days_in_stage_db so the database does the date math"""
+        return self.annotate(days_in_stage_db=models.ExpressionWrapper(
+            TruncDate(Now()) - TruncDate('updated_at'),
+            output_field=models.DurationField()))
+
+
 class Deal(models.Model):
     """Real estate deals in the pipeline"""
     PRIORITY_CHOICES = [
@@ -462,6 +970,8 @@ class Deal(models.Model):
     # Additional notes and documents
     notes = models.TextField(blank=True)
 
+    objects = DealQuerySet.as_manager()
+
     class Meta:
         ordering = ['stage__order', 'position', '-created_at']
         indexes = [
@@ -483,13 +993,70 @@ class Deal(models.Model):
     @property
     def days_in_stage(self):
         """Calculate how many days the deal has been in current stage"""
-        from django.utils import timezone
+        # Prefer the value annotated by DealQuerySet.with_days_in_stage()
+        annotated = getattr(self, 'days_in_stage_db', None)
+        if annotated is not None:
+            return annotated.days
         return (timezone.now().date() - self.updated_at.date()).days
 
+    @classmethod
+    def reorder(cls, stage_id, ordered_ids):
+        """
+        Place ordered_ids in stage_id at positions 0..n-1 with one UPDATE.
+
+        Deals arriving from another stage also get stage and updated_at set,
+        as save() would, so days_in_stage restarts. The stage row is locked
+        for the duration so concurrent drags on the same column serialize.
+        """
+        if not ordered_ids:
+            return 0
+        with transaction.atomic():
+            list(DealStage.objects.select_for_update().filter(pk=stage_id))
+            return cls.objects.filter(pk__in=ordered_ids).update(
+                position=models.Case(
+                    *(models.When(pk=pk, then=models.Value(index))
+                      for index, pk in enumerate(ordered_ids)),
+                    output_field=models.IntegerField()),
+                updated_at=models.Case(
+                    models.When(~models.Q(stage_id=stage_id),
+                                then=models.Value(timezone.now())),
+                    default=models.F('updated_at')),
+                stage_id=stage_id,
+            )
+
+
+# Fields UserOwnedProperty reads from property_ref when it is set
+OWNED_DISPLAY_FIELDS = ('address', 'city', 'state', 'property_type')
+
+
+def _owned_display(field, prefix=''):
+    """SQL equivalent of UserOwnedProperty.<field>; prefix spans a relation"""
+    return models.Case(
+        models.When(**{f'{prefix}property_ref__isnull': False},
+                    then=models.F(f'{prefix}property_ref__{field}')),
+        default=models.F(f'{prefix}custom_{field}'),
+        output_field=models.CharField(),
+    )
+
+
+class UserOwnedPropertyQuerySet(models.QuerySet):
+    """Query helpers shared by the portfolio views"""
+
+    def with_display_fields(self):
+        """
+        Annotate display_address/city/state/property_type so listings read
+        them from the same row instead of fetching property_ref per object.
+        """
+        return self.annotate(**{
+            f'display_{field}': _owned_display(field)
+            for field in OWNED_DISPLAY_FIELDS
+        })
+
 
 class UserOwnedProperty(models.Model):
     """Properties owned by users for portfolio tracking"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Indexed as the leading column of ['user', 'status'] in Meta
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     property_ref = models.ForeignKey(
         Property, on_delete=models.CASCADE, null=True, blank=True)
 
@@ -514,6 +1081,11 @@ class UserOwnedProperty(models.Model):
     interest_rate = models.DecimalField(
         max_digits=5, decimal_places=3, null=True, blank=True)  # 4.250%
     loan_term_years = models.IntegerField(null=True, blank=True)
+    # Derived from the loan terms in save() so balances don't recompute them
+    monthly_payment = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True)
+    amortization_factor = models.FloatField(
+        null=True, blank=True)  # (1 + monthly rate) ** payments
 
     # Current values
     current_estimated_value = models.DecimalField(
@@ -546,39 +1118,51 @@ class UserOwnedProperty(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Inputs to monthly_payment and amortization_factor
+    LOAN_FIELDS = frozenset(['loan_amount', 'interest_rate', 'loan_term_years'])
+
+    objects = UserOwnedPropertyQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['purchase_date']),
+            # Admin list_filter drill-downs
+            models.Index(fields=['status', 'user']),
+            models.Index(fields=['custom_state']),
+            models.Index(fields=['purchase_date'],
+                         condition=~models.Q(status='sold'),
+                         name='owned_held_purchase_dt'),
         ]
 
+    def _display_field(self, field):
+        # Prefer the with_display_fields() annotation when it was loaded
+        annotated = self.__dict__.get(f'display_{field}')
+        if annotated is not None:
+            return annotated
+        if self.property_ref_id is not None:
+            return getattr(self.property_ref, field)
+        return getattr(self, f'custom_{field}')
+
     @property
     def address(self):
         """Return address from property_ref or custom fields"""
-        if self.property_ref:
-            return self.property_ref.address
-        return self.custom_address
+        return self._display_field('address')
 
     @property
     def city(self):
         """Return city from property_ref or custom fields"""
-        if self.property_ref:
-            return self.property_ref.city
-        return self.custom_city
+        return self._display_field('city')
 
     @property
     def state(self):
         """Return state from property_ref or custom fields"""
-        if self.property_ref:
-            return self.property_ref.state
-        return self.custom_state
+        return self._display_field('state')
 
     @property
     def property_type(self):
         """Return property type from property_ref or custom fields"""
-        if self.property_ref:
-            return self.property_ref.property_type
-        return self.custom_property_type
+        return self._display_field('property_type')
 
     @property
     def current_equity(self):
@@ -592,40 +1176,40 @@ class UserOwnedProperty(models.Model):
 
         return self.current_estimated_value - remaining_balance
 
-    @property
+    # Cached per instance; save() drops it, del it after changing loan terms
+    # on an unsaved instance
+    @cached_property
     def remaining_loan_balance(self):
         """Calculate remaining loan balance"""
         if not all([self.loan_amount, self.interest_rate, self.loan_term_years]):
             return None
 
-        from datetime import date
-        from decimal import Decimal
-        import math
-
-        monthly_rate = float(self.interest_rate) / 100 / 12
         total_payments = self.loan_term_years * 12
-
-        # Calculate monthly payment
-        if monthly_rate == 0:
-            monthly_payment = float(self.loan_amount) / total_payments
-        else:
-            monthly_payment = float(self.loan_amount) * (monthly_rate * (
-                1 + monthly_rate)**total_payments) / ((1 + monthly_rate)**total_payments - 1)
-
-        # Calculate payments made
-        months_elapsed = (date.today().year - self.purchase_date.year) * \
-            12 + (date.today().month - self.purchase_date.month)
-        months_elapsed = max(0, min(months_elapsed, total_payments))
-
-        # Calculate remaining balance
-        if months_elapsed >= total_payments:
-            return Decimal('0.00')
-
-        remaining_payments = total_payments - months_elapsed
-        remaining_balance = monthly_payment * ((1 + monthly_rate)**remaining_payments - 1) / (
-            monthly_rate * (1 + monthly_rate)**remaining_payments)
-
-        return Decimal(str(round(remaining_balance, 2)))
+        months_elapsed = max(0, min(
+            _months_elapsed(self.purchase_date, date.today()), total_payments))
+        return _to_decimal(_remaining_balance(
+            float(self.loan_amount), float(self.interest_rate) / 100 / 12,
+            total_payments, months_elapsed, self.amortization_factor))
+
+    def loan_schedule(self):
+        """(monthly_payment, amortization_factor) for the loan terms"""
+        if not all([self.loan_amount, self.interest_rate, self.loan_term_years]):
+            return None, None
+        monthly_rate = float(self.interest_rate) / 100 / 12
+        full_term = (1 + monthly_rate) ** (self.loan_term_years * 12)
+        payment = float(self.loan_amount) * monthly_rate * full_term / (
+            full_term - 1)
+        return _to_decimal(payment), full_term
+
+    def save(self, *args, **kwargs):
+        self.monthly_payment, self.amortization_factor = self.loan_schedule()
+        self.__dict__.pop('remaining_loan_balance', None)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and \
+                self.LOAN_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = {
+                *update_fields, 'monthly_payment', 'amortization_factor'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} - {self.address}"
@@ -633,8 +1217,10 @@ class UserOwnedProperty(models.Model):
 
 class RentalTransaction(models.Model):
     """Track rental income and expenses for owned properties"""
+    # Indexed as the leading column of the composite indexes in Meta
     owned_property = models.ForeignKey(
-        UserOwnedProperty, on_delete=models.CASCADE, related_name='transactions')
+        UserOwnedProperty, on_delete=models.CASCADE, related_name='transactions',
+        db_index=False)
 
     TRANSACTION_TYPE_CHOICES = [
         ('income', 'Income'),
@@ -682,6 +1268,15 @@ class RentalTransaction(models.Model):
             models.Index(fields=['owned_property', 'transaction_type']),
             models.Index(fields=['date']),
             models.Index(fields=['category']),
+            # Also covers PortfolioMetrics' per-type totals over a date range,
+            # so that aggregate reads only the index
+            models.Index(fields=['owned_property', 'date', 'transaction_type',
+                                 'amount']),
+            models.Index(fields=['transaction_type', 'category']),
+            # Few rows carry receipts, so this stays small
+            models.Index(fields=['date'],
+                         condition=models.Q(receipt_uploaded=True),
+                         name='rental_txn_receipt_date'),
         ]
 
     def __str__(self):
@@ -737,25 +1332,59 @@ class PortfolioMetrics(models.Model):
         """Calculate all portfolio metrics for the user"""
         owned_properties = UserOwnedProperty.objects.filter(user=self.user)
 
-        # Basic counts and totals
-        self.total_properties = owned_properties.count()
-        self.total_investment = sum(
-            prop.purchase_price for prop in owned_properties)
-
-        # Calculate current portfolio value and equity
-        portfolio_value = 0
-        total_equity = 0
-
-        for prop in owned_properties:
-            current_value = prop.current_estimated_value or prop.purchase_price
-            portfolio_value += current_value
-
-            equity = prop.current_equity
-            if equity:
-                total_equity += equity
-            else:
-                # If no loan info, assume full equity
-                total_equity += current_value
+        # Property type and city come from property_ref when it is set
+        def via_ref(field):
+            return NullIf(_owned_display(field), models.Value(''))
+
+        # Counts, totals and diversity in one query
+        totals = owned_properties.aggregate(
+            count=models.Count('id'),
+            investment=models.Sum('purchase_price'),
+            value=models.Sum(Coalesce(
+                NullIf('current_estimated_value', models.Value(Decimal(0))),
+                'purchase_price')),
+            down_payments=models.Sum('down_payment'),
+            property_types=models.Count(via_ref('property_type'),
+                                        distinct=True),
+            cities=models.Count(via_ref('city'), distinct=True),
+        )
+        self.total_properties = totals['count']
+        self.total_investment = totals['investment'] or 0
+        portfolio_value = totals['value'] or 0
+
+        # Holdings without a valuation or complete loan info count at full
+        # value, so only financed, valued holdings are fetched; their
+        # balances come from one NumPy pass (same rules as current_equity)
+        today = date.today()
+        total_equity = portfolio_value
+
+        holdings = owned_properties.filter(
+            current_estimated_value__isnull=False, loan_amount__isnull=False,
+            interest_rate__isnull=False, loan_term_years__isnull=False,
+        ).exclude(
+            models.Q(current_estimated_value=0) | models.Q(loan_amount=0) |
+            models.Q(interest_rate=0) | models.Q(loan_term_years=0)
+        ).values_list(
+            'current_estimated_value', 'loan_amount', 'interest_rate',
+            'loan_term_years', 'purchase_date', 'amortization_factor')
+
+        # One streamed pass keeps only the values and the loan terms
+        values, terms = [], []
+        for value, loan, rate, years, bought, factor in holdings.iterator(
+                chunk_size=500):
+            values.append(value)
+            terms.append((
+                float(loan), float(rate) / 100 / 12, years * 12,
+                max(0, min(_months_elapsed(bought, today), years * 12)),
+                np.nan if factor is None else factor))
+        terms = np.array(terms, dtype=np.float64).reshape(-1, 5)
+        balances = _remaining_balances(*terms.T)
+
+        for current_estimated_value, balance in zip(values, balances):
+            balance = _to_decimal(balance)
+            # A holding with exactly zero equity counts at full value
+            if current_estimated_value != balance:
+                total_equity -= balance
 
         self.portfolio_value = portfolio_value
         self.total_equity = total_equity
@@ -767,24 +1396,16 @@ class PortfolioMetrics(models.Model):
                 self.total_appreciation / self.total_investment) * 100
 
         # Calculate cash flow from transactions (last 12 months)
-        from datetime import date, timedelta
-        one_year_ago = date.today() - timedelta(days=365)
-
-        recent_income = sum(
-            transaction.amount for transaction in RentalTransaction.objects.filter(
-                owned_property__user=self.user,
-                transaction_type='income',
-                date__gte=one_year_ago
-            )
-        )
+        one_year_ago = today - timedelta(days=365)
 
-        recent_expenses = sum(
-            transaction.amount for transaction in RentalTransaction.objects.filter(
-                owned_property__user=self.user,
-                transaction_type='expense',
-                date__gte=one_year_ago
-            )
-        )
+        recent_totals = dict(RentalTransaction.objects.filter(
+            owned_property__user=self.user,
+            date__gte=one_year_ago
+        ).values('transaction_type').annotate(
+            total=models.Sum('amount')
+        ).values_list('transaction_type', 'total'))
+        recent_income = recent_totals.get('income', 0)
+        recent_expenses = recent_totals.get('expense', 0)
 
         annual_cash_flow = recent_income - recent_expenses
         self.annual_cash_flow = annual_cash_flow
@@ -795,10 +1416,7 @@ class PortfolioMetrics(models.Model):
         self.total_monthly_expenses = recent_expenses / 12
 
         # Calculate returns
-        total_down_payments = sum(
-            prop.down_payment for prop in owned_properties
-            if prop.down_payment
-        ) or self.total_investment
+        total_down_payments = totals['down_payments'] or self.total_investment
 
         if total_down_payments > 0:
             self.cash_on_cash_return = (
@@ -815,22 +1433,10 @@ class PortfolioMetrics(models.Model):
             self.portfolio_cap_rate = (
                 net_operating_income / self.portfolio_value) * 100
 
-        # Calculate diversification score (simple version based on property types and locations)
-        property_types = set()
-        cities = set()
-
-        for prop in owned_properties:
-            if prop.property_type:
-                property_types.add(prop.property_type)
-            if prop.city:
-                cities.add(prop.city)
-
-        # Simple diversification score: more types and locations = higher score
-        type_diversity = min(len(property_types), 5) * \
-            1  # Max 5 points for property types
-        # Max 5 points for locations
-        location_diversity = min(len(cities), 5) * 1
-        self.diversification_score = type_diversity + location_diversity
+        # Simple diversification score: up to 5 points each for distinct
+        # property types and cities
+        self.diversification_score = (
+            min(totals['property_types'], 5) + min(totals['cities'], 5))
 
         self.save()
 
@@ -1,12 +1,34 @@
+import hashlib
 import requests
 import logging
 import openai
 import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from decimal import Decimal
-from .models import Property, InvestmentMetrics, PropertyValuation
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3 import __version__ as urllib3_version
+from urllib3.util.retry import Retry
+from .models import Property, InvestmentMetrics, PropertyValuation, _as_decimal
+from typing import Dict, Iterator, List, Optional
+
+try:
+    # Parses API payloads straight from bytes, several times faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Retry backoff jitter and cap need urllib3 2; older releases retry without
+# jitter under their default 120s cap
+if int(urllib3_version.split('.')[0]) >= 2:
+    RETRY_BACKOFF_KWARGS = {'backoff_jitter': 0.5, 'backoff_max': 4}
+else:
+    RETRY_BACKOFF_KWARGS = {}
 
 logger = logging.getLogger(__name__)
 
@@ -14,59 +36,171 @@ logger = logging.getLogger(__name__)
 class OpenAIProfitPredictor:
     """Service for AI-powered potential profit prediction using OpenAI"""
 
+    # Properties sent per chat completion in predict_batch
+    BATCH_SIZE = 25
+    # Chat completions predict_batch keeps in flight at once
+    CONCURRENCY = 8
+
+    # System prompt shared by live and Batch API prediction requests
+    SYSTEM_MESSAGE = {
+        "role": "system",
+        "content": "You are a professional real estate investment analyst with 20 years of experience. Provide realistic profit predictions based on current market conditions, property characteristics, and location factors."
+    }
+
+    # Batch API states after which collect_batch has nothing to read yet
+    PENDING_BATCH_STATUSES = ('validating', 'in_progress', 'finalizing',
+                              'cancelling')
+
+    # Property columns read by _prepare_property_data and the log lines
+    PROPERTY_FIELDS = [
+        'id', 'address', 'city', 'state', 'property_type', 'year_built',
+        'bedrooms', 'bathrooms', 'square_feet', 'lot_size', 'current_price',
+        'estimated_value', 'tax_assessment', 'annual_taxes', 'estimated_rent',
+    ]
+
     def __init__(self):
         self.api_key = settings.OPENAI_API_KEY
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in settings")
 
-    def predict_potential_profit(self, property_obj: Property) -> Optional[Decimal]:
+    def predict_batch(self, properties: List[Property]) -> Dict[int, Decimal]:
         """
-        Use OpenAI to predict potential profit based on property characteristics
-        and market conditions
+        Predict potential profit for many properties, one OpenAI request per
+        BATCH_SIZE properties instead of one per property. Up to CONCURRENCY
+        requests run at once over a shared client.
+        Returns a property id -> predicted profit map; properties whose
+        prediction is missing or implausible are left out.
         """
-        try:
-            # Prepare property data for AI analysis
-            property_data = self._prepare_property_data(property_obj)
+        predictions = {}
+        if not properties:
+            return predictions
 
-            # Create the prompt for OpenAI
-            prompt = self._create_profit_prediction_prompt(property_data)
+        client = openai.OpenAI(api_key=self.api_key)
+        chunks = self._chunks(properties)
 
-            # Get prediction from OpenAI
-            client = openai.OpenAI(api_key=self.api_key)
+        # Each request waits seconds on OpenAI, so send the chunks together
+        with ThreadPoolExecutor(
+                max_workers=min(self.CONCURRENCY, len(chunks))) as executor:
+            for chunk_predictions in executor.map(
+                    lambda chunk: self._predict_chunk(client, chunk), chunks):
+                predictions.update(chunk_predictions)
 
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",  # More cost-effective model
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional real estate investment analyst with 20 years of experience. Provide realistic profit predictions based on current market conditions, property characteristics, and location factors."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=150,
-                temperature=0.3  # Lower temperature for more consistent predictions
-            )
+        logger.info(
+            f"OpenAI predicted profit for {len(predictions)} of {len(properties)} properties")
+        return predictions
 
-            # Parse the response to extract the profit prediction
-            prediction_text = response.choices[0].message.content.strip()
-            predicted_profit = self._parse_profit_prediction(prediction_text)
+    def submit_batch(self, properties: List[Property]) -> str:
+        """
+        Queue profit predictions through the OpenAI Batch API, which costs
+        half as much as predict_batch but answers within 24 hours.
+        Sends the same BATCH_SIZE chunks as predict_batch and returns the
+        batch id to pass to collect_batch.
+        """
+        client = openai.OpenAI(api_key=self.api_key)
+        lines = [
+            json.dumps({
+                'custom_id': f"chunk-{number}",
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._chunk_request(chunk),
+            })
+            for number, chunk in enumerate(self._chunks(properties))
+        ]
+        batch_file = client.files.create(
+            file=('profit_predictions.jsonl', '\n'.join(lines).encode()),
+            purpose='batch')
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h')
+        logger.info(
+            f"Submitted OpenAI batch {batch.id} for {len(properties)} properties")
+        return batch.id
 
-            if predicted_profit is not None:
-                logger.info(
-                    f"OpenAI predicted profit for {property_obj.address}: ${predicted_profit}")
-                return Decimal(str(predicted_profit))
-            else:
-                logger.warning(
-                    f"Could not parse OpenAI profit prediction: {prediction_text}")
-                return None
+    def collect_batch(self, batch_id: str) -> Optional[Dict[int, Decimal]]:
+        """
+        Predictions from a submit_batch batch, as returned by predict_batch.
+        Returns None while the batch is still running; batches that failed or
+        expired yield whatever chunks did complete.
+        """
+        client = openai.OpenAI(api_key=self.api_key)
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in self.PENDING_BATCH_STATUSES:
+            logger.info(f"OpenAI batch {batch_id} is {batch.status}")
+            return None
 
+        predictions = {}
+        if batch.output_file_id:
+            output = client.files.content(batch.output_file_id).content
+            for line in output.splitlines():
+                result = json_loads(line)
+                response = result.get('response') or {}
+                if response.get('status_code') != 200:
+                    logger.error(
+                        f"OpenAI batch request {result.get('custom_id')} failed: {result.get('error')}")
+                    continue
+                try:
+                    predictions.update(self._parse_chunk_predictions(
+                        response['body']['choices'][0]['message']['content']))
+                except (KeyError, IndexError, ValueError) as e:
+                    logger.error(
+                        f"Could not parse OpenAI batch request {result.get('custom_id')}: {e}")
+
+        logger.info(
+            f"OpenAI batch {batch_id} ({batch.status}) predicted profit for {len(predictions)} properties")
+        return predictions
+
+    def _chunks(self, properties: List[Property]) -> List[List[Property]]:
+        return [properties[start:start + self.BATCH_SIZE]
+                for start in range(0, len(properties), self.BATCH_SIZE)]
+
+    def _chunk_request(self, chunk: List[Property]) -> Dict:
+        """Chat completion arguments predicting profit for one chunk"""
+        payload = [{'id': property_obj.id, **self._prepare_property_data(property_obj)}
+                   for property_obj in chunk]
+        return {
+            'model': "gpt-4o-mini",
+            'messages': [
+                self.SYSTEM_MESSAGE,
+                {
+                    "role": "user",
+                    "content": (
+                        "Predict the potential profit over 3-5 years in US dollars "
+                        "(positive or negative) for each of these investment properties:\n"
+                        f"{json.dumps(payload)}\n\n"
+                        'Respond ONLY with JSON of the form {"predictions": {"<id>": <profit>}}.'
+                    )
+                }
+            ],
+            'response_format': {"type": "json_object"},
+            'max_tokens': 30 * len(chunk) + 50,
+            'temperature': 0.3,
+        }
+
+    def _parse_chunk_predictions(self, content: str) -> Dict[int, Decimal]:
+        """Plausible predictions from a _chunk_request answer"""
+        predictions = {}
+        data = json_loads(content)
+        for property_id, amount in data.get('predictions', {}).items():
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                continue
+            if self._is_plausible_profit(amount):
+                predictions[int(property_id)] = Decimal(str(amount))
+        return predictions
+
+    def _predict_chunk(self, client, chunk: List[Property]) -> Dict[int, Decimal]:
+        """One predict_batch request; failures are logged and yield {}"""
+        try:
+            response = client.chat.completions.create(
+                **self._chunk_request(chunk))
+            return self._parse_chunk_predictions(
+                response.choices[0].message.content)
         except Exception as e:
             logger.error(
-                f"OpenAI profit prediction failed for {property_obj.address}: {e}")
-            return None
+                f"OpenAI batch profit prediction failed for {len(chunk)} properties: {e}")
+            return {}
 
     def _prepare_property_data(self, property_obj: Property) -> Dict:
         """Prepare property data for AI analysis"""
@@ -87,90 +221,10 @@ class OpenAIProfitPredictor:
             'estimated_rent': float(property_obj.estimated_rent) if property_obj.estimated_rent else None
         }
 
-    def _create_profit_prediction_prompt(self, property_data: Dict) -> str:
-        """Create a detailed prompt for OpenAI profit prediction"""
-
-        # Format financial values safely
-        current_price_str = f"${property_data['current_price']:,.0f}" if property_data['current_price'] else 'N/A'
-        estimated_value_str = f"${property_data['estimated_value']:,.0f}" if property_data['estimated_value'] else 'N/A'
-        tax_assessment_str = f"${property_data['tax_assessment']:,.0f}" if property_data['tax_assessment'] else 'N/A'
-        annual_taxes_str = f"${property_data['annual_taxes']:,.0f}" if property_data['annual_taxes'] else 'N/A'
-        estimated_rent_str = f"${property_data['estimated_rent']:,.0f}" if property_data['estimated_rent'] else 'N/A'
-
-        return f"""
-Analyze this real estate investment property and predict the potential profit over 3-5 years:
-
-PROPERTY DETAILS:
-- Address: {property_data['address']}, {property_data['city']}, {property_data['state']}
-- Type: {property_data['property_type']}
-- Year Built: {property_data['year_built']}
-- Size: {property_data['bedrooms']}bd/{property_data['bathrooms']}ba, {property_data['square_feet']} sqft
-- Lot Size: {property_data['lot_size']} acres
-- Current Sale Price: {current_price_str}
-- Market Estimate: {estimated_value_str}
-- Tax Assessment: {tax_assessment_str}
-- Annual Taxes: {annual_taxes_str}
-- Estimated Monthly Rent: {estimated_rent_str}
-
-Consider these factors in your analysis:
-1. Local market trends in {property_data['city']}, {property_data['state']}
-2. Property age and condition (built {property_data['year_built']})
-3. Rental income potential vs property value
-4. Market appreciation trends
-5. Tax implications and carrying costs
-
-Provide ONLY a realistic potential profit prediction as a dollar amount (positive or negative). 
-Format your response as: "Predicted Potential Profit: $XX,XXX"
-Include a brief 2-sentence explanation of the key factors driving this prediction.
-"""
-
-    def _parse_profit_prediction(self, prediction_text: str) -> Optional[float]:
-        """Parse the profit prediction from OpenAI response"""
-        try:
-            # Look for dollar amounts in the response
-            import re
-
-            logger.info(f"Parsing OpenAI response: {prediction_text}")
-
-            # Enhanced pattern to match dollar amounts (with or without commas, with or without negative sign)
-            dollar_patterns = [
-                r'[-]?\$[\d,]+(?:\.[\d]{1,2})?',  # $1,250,000 or $-50,000
-                r'[-]?[\d,]+(?:\.[\d]{1,2})?',    # 1,250,000 or -50,000
-            ]
-
-            for pattern in dollar_patterns:
-                matches = re.findall(pattern, prediction_text)
-
-                if matches:
-                    # Take the first substantial dollar amount found
-                    for match in matches:
-                        # Clean the match
-                        clean_amount = match.replace('$', '').replace(',', '')
-                        try:
-                            amount = float(clean_amount)
-                            # Return amounts that seem reasonable (between -$2M and +$2M)
-                            # At least $1,000
-                            if -2000000 <= amount <= 2000000 and abs(amount) >= 1000:
-                                logger.info(
-                                    f"Parsed profit prediction: ${amount}")
-                                return amount
-                        except ValueError:
-                            continue
-
-            # Fallback: look for specific phrases
-            prediction_lower = prediction_text.lower()
-            if 'no profit' in prediction_lower or 'break even' in prediction_lower:
-                return 0.0
-            elif 'loss' in prediction_lower and 'profit' not in prediction_lower:
-                return -10000.0  # Default small loss if we can't parse exact amount
-
-            logger.warning(
-                f"Could not parse any dollar amount from: {prediction_text}")
-            return None
-
-        except Exception as e:
-            logger.error(f"Error parsing profit prediction: {e}")
-            return None
+    @staticmethod
+    def _is_plausible_profit(amount: float) -> bool:
+        """Reasonable predictions lie between -$2M and +$2M, and are at least $1,000"""
+        return -2000000 <= amount <= 2000000 and abs(amount) >= 1000
 
 
 class AttomAPIService:
@@ -178,43 +232,167 @@ class AttomAPIService:
 
     BASE_URL = "https://api.gateway.attomdata.com"
 
+    # Property search endpoints, most detailed first
+    SEARCH_ENDPOINTS = (
+        "/propertyapi/v1.0.0/property/expandedprofile",
+        "/propertyapi/v1.0.0/property/basicprofile",
+        "/propertyapi/v1.0.0/assessment/detail",
+    )
+
+    # Kept-alive connections per host, shared by every request of a service;
+    # covers all endpoints of every market in a bulk sync (8 x 3). It also
+    # bounds concurrency: further requests wait for a free connection
+    POOL_SIZE = 32
+    # (connect, read) seconds
+    TIMEOUT = (5, 15)
+    # Transient failures are retried with exponential backoff before
+    # _make_request sees the response; the jitter keeps concurrent market
+    # syncs from retrying in lockstep and each wait is capped at 4s, see
+    # RETRY_BACKOFF_KWARGS (a 429's Retry-After header still takes precedence)
+    RETRY = Retry(total=5, backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=['GET'], raise_on_status=False,
+                  **RETRY_BACKOFF_KWARGS)
+
+    # Sessions by API key, see _shared_session
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    # An endpoint whose requests fail BREAKER_THRESHOLD times in a row, after
+    # retries, is skipped process-wide for BREAKER_COOLDOWN seconds
+    BREAKER_THRESHOLD = 3
+    BREAKER_COOLDOWN = 60
+    _breaker_lock = threading.Lock()
+    _breaker_state = {}  # endpoint -> (consecutive failures, open until)
+
+    # ATTOM property data changes daily at most, so responses are reused
+    RESPONSE_CACHE_TIMEOUT = 86400
+
+    # Lowercase full state name -> postal abbreviation
+    STATE_ABBREVIATIONS = {
+        'california': 'CA', 'new york': 'NY', 'florida': 'FL',
+        'texas': 'TX', 'georgia': 'GA', 'illinois': 'IL',
+        'arizona': 'AZ', 'colorado': 'CO', 'north carolina': 'NC',
+        'tennessee': 'TN', 'washington': 'WA', 'oregon': 'OR',
+        'nevada': 'NV', 'utah': 'UT', 'ohio': 'OH', 'michigan': 'MI',
+        'delaware': 'DE', 'maryland': 'MD', 'virginia': 'VA'
+    }
+
     def __init__(self):
         self.api_key = settings.ATTOM_API_KEY
         if not self.api_key:
             raise ValueError("ATTOM_API_KEY not found in settings")
 
-    def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Make authenticated request to ATTOM API"""
-        headers = {
-            'accept': 'application/json',
-            'apikey': self.api_key
-        }
+        self.session = self._shared_session(self.api_key)
+        self.urls = {endpoint: self.BASE_URL + endpoint
+                     for endpoint in self.SEARCH_ENDPOINTS}
+
+    @classmethod
+    def _shared_session(cls, api_key: str) -> requests.Session:
+        """
+        The process-wide session for api_key. Views and syncers build a new
+        service per call, so sharing it keeps TCP/TLS connections warm
+        across them.
+        """
+        with cls._sessions_lock:
+            session = cls._sessions.get(api_key)
+            if session is None:
+                session = requests.Session()
+                session.headers.update({
+                    'accept': 'application/json',
+                    'apikey': api_key
+                })
+                session.mount('https://', HTTPAdapter(
+                    pool_maxsize=cls.POOL_SIZE, pool_block=True,
+                    max_retries=cls.RETRY))
+                cls._sessions[api_key] = session
+        return session
+
+    @classmethod
+    def _circuit_open(cls, endpoint: str) -> bool:
+        with cls._breaker_lock:
+            _, open_until = cls._breaker_state.get(endpoint, (0, 0.0))
+        return time.monotonic() < open_until
+
+    @classmethod
+    def _record_outcome(cls, endpoint: str, ok: bool):
+        """Close the endpoint's circuit on success, count toward opening it otherwise"""
+        with cls._breaker_lock:
+            if ok:
+                cls._breaker_state.pop(endpoint, None)
+                return
+            failures = cls._breaker_state.get(endpoint, (0, 0.0))[0] + 1
+            open_until = 0.0
+            if failures >= cls.BREAKER_THRESHOLD:
+                open_until = time.monotonic() + cls.BREAKER_COOLDOWN
+                logger.warning(
+                    "ATTOM endpoint %s failed %d times in a row, skipping it for %ss",
+                    endpoint, failures, cls.BREAKER_COOLDOWN)
+            cls._breaker_state[endpoint] = (failures, open_until)
+
+    @staticmethod
+    def response_cache_key(endpoint: str, params: Dict = None) -> str:
+        request = f"{endpoint}|{sorted((params or {}).items())}"
+        return f"attom:{hashlib.blake2b(request.encode(), digest_size=16).hexdigest()}"
+
+    def _make_request(self, endpoint: str, params: Dict = None,
+                      refresh: bool = False) -> Optional[Dict]:
+        """
+        Make authenticated request to ATTOM API.
+
+        Responses with results are cached for RESPONSE_CACHE_TIMEOUT; pass
+        refresh=True to skip the cached copy.
+        """
+        cache_key = self.response_cache_key(endpoint, params)
+        if not refresh:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.debug("ATTOM API cache hit: %s with params: %s",
+                             endpoint, params)
+                return cached
+
+        if self._circuit_open(endpoint):
+            logger.warning("Skipping ATTOM endpoint %s: circuit open", endpoint)
+            return None
 
-        url = f"{self.BASE_URL}{endpoint}"
-        logger.info(f"ATTOM API request: {url} with params: {params}")
+        url = self.urls.get(endpoint) or self.BASE_URL + endpoint
+        logger.debug("ATTOM API request: %s with params: %s", url, params)
 
         try:
-            response = requests.get(
-                url, headers=headers, params=params or {}, timeout=15)
-            logger.info(f"ATTOM API response status: {response.status_code}")
+            response = self.session.get(
+                url, params=params or {}, timeout=self.TIMEOUT)
+            logger.debug("ATTOM API response status: %s", response.status_code)
+            # Other 4xx answers are about the query (ATTOM reports some
+            # empty searches that way), not the endpoint's health
+            self._record_outcome(
+                endpoint, response.status_code not in self.RETRY.status_forcelist)
 
             if response.status_code != 200:
-                logger.error(f"ATTOM API error response: {response.text}")
+                # Error pages can be large; the first 512 characters suffice
+                logger.error("ATTOM API error from %s (%s): %.512s",
+                             endpoint, response.status_code, response.text)
                 return None
 
-            response_data = response.json()
+            response_data = json_loads(response.content)
 
             # Check if ATTOM returns "SuccessWithoutResult"
-            if (response_data.get('status', {}).get('msg') == 'SuccessWithoutResult' or
-                    response_data.get('status', {}).get('total', 0) == 0):
+            status_info = response_data.get('status', {})
+            if (status_info.get('msg') == 'SuccessWithoutResult' or
+                    status_info.get('total', 0) == 0):
                 logger.warning(
-                    f"ATTOM API returned no results for {endpoint} with params {params}")
+                    "ATTOM API returned no results for %s with params %s",
+                    endpoint, params)
                 return None
 
+            cache.set(cache_key, response_data, self.RESPONSE_CACHE_TIMEOUT)
             return response_data
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"ATTOM API request failed: {e}")
+            self._record_outcome(endpoint, ok=False)
+            logger.error("ATTOM API request failed: %s", e)
+            return None
+        except ValueError as e:
+            logger.error("ATTOM API returned invalid JSON: %s", e)
             return None
 
     def search_properties(self, address: str = None, city: str = None, state: str = None,
@@ -222,330 +400,296 @@ class AttomAPIService:
         """Search for properties using ATTOM API with correct parameters"""
 
         # Convert state to abbreviation if needed
-        if state:
-            state_abbr = self._get_state_abbreviation(state)
-        else:
-            state_abbr = state
+        state_abbr = self._get_state_abbreviation(state)
 
         logger.info(
-            f"Searching ATTOM properties for city={city}, state={state_abbr}, zip={zip_code}")
-
-        # Try ATTOM API endpoints with correct parameters
-        endpoints_to_try = [
-            # Try expanded profile search (working)
-            ("/propertyapi/v1.0.0/property/expandedprofile",
-             self._build_address_params),
-            # Try basic profile (working)
-            ("/propertyapi/v1.0.0/property/basicprofile", self._build_address_params),
-            # Try assessment search (working)
-            ("/propertyapi/v1.0.0/assessment/detail", self._build_address_params),
-        ]
+            "Searching ATTOM properties for city=%s, state=%s, zip=%s",
+            city, state_abbr, zip_code)
+
+        # Every search endpoint takes the same address parameters
+        params = self._build_address_params(
+            city, state_abbr, zip_code, page_size)
+        if not params:
+            logger.warning("No ATTOM search parameters for city=%s, state=%s, "
+                           "zip=%s", city, state_abbr, zip_code)
+            return []
 
-        for endpoint, param_builder in endpoints_to_try:
-            try:
-                params = param_builder(city, state_abbr, zip_code, page_size)
-                if not params:  # Skip if no valid parameters
+        # Query every endpoint at once but keep the preference order above:
+        # a miss on the first costs the slowest round trip, not the sum
+        executor = ThreadPoolExecutor(max_workers=len(self.SEARCH_ENDPOINTS))
+        try:
+            futures = [(endpoint, executor.submit(self._make_request, endpoint, params))
+                       for endpoint in self.SEARCH_ENDPOINTS]
+            for endpoint, future in futures:
+                try:
+                    properties = self._extract_properties(future.result())
+                except Exception as e:
+                    logger.error("Error trying endpoint %s: %s", endpoint, e)
                     continue
-
-                data = self._make_request(endpoint, params)
-
-                if data and self._extract_properties(data):
-                    properties = self._extract_properties(data)
-                    logger.info(
-                        f"Found {len(properties)} properties via {endpoint}")
+                if properties:
+                    logger.info("Found %d properties via %s",
+                                len(properties), endpoint)
                     return properties
-
-            except Exception as e:
-                logger.error(f"Error trying endpoint {endpoint}: {e}")
-                continue
+        finally:
+            # Don't wait on lower-priority requests once one has answered
+            executor.shutdown(wait=False, cancel_futures=True)
 
         logger.warning("All ATTOM API endpoints failed - no data available")
         return []
 
-    def _get_state_abbreviation(self, state: str) -> str:
+    @classmethod
+    def _get_state_abbreviation(cls, state: str) -> str:
         """Convert full state name to abbreviation"""
-        state_mapping = {
-            'california': 'CA', 'new york': 'NY', 'florida': 'FL',
-            'texas': 'TX', 'georgia': 'GA', 'illinois': 'IL',
-            'arizona': 'AZ', 'colorado': 'CO', 'north carolina': 'NC',
-            'tennessee': 'TN', 'washington': 'WA', 'oregon': 'OR',
-            'nevada': 'NV', 'utah': 'UT', 'ohio': 'OH', 'michigan': 'MI',
-            'delaware': 'DE', 'maryland': 'MD', 'virginia': 'VA'
-        }
-        return state_mapping.get(state.lower(), state)
+        if not state:
+            return state
+        return cls.STATE_ABBREVIATIONS.get(state.lower(), state)
 
-    def _build_address_params(self, city: str, state: str, zip_code: str, page_size: int) -> Dict:
+    @staticmethod
+    def _build_address_params(city: str, state: str, zip_code: str,
+                              page_size: int) -> Optional[Dict]:
         """Build parameters using address1 and address2 format that works"""
-        params = {}
-
-        # For city searches, we need to construct a generic address
-        # Since ATTOM needs specific addresses, we'll use postal code when available
+        # ATTOM needs specific addresses, so use the postal code when available
         if zip_code:
-            params['postalcode'] = zip_code
+            params = {'postalcode': zip_code}
         elif city and state:
-            # Use a generic street address format for city searches
-            params['address2'] = f"{city}, {state}"
-            # Try with a generic address - this might return multiple properties
-            params['address1'] = "Main St"  # Generic street for area search
+            # A generic street in the city's address line returns the area
+            params = {'address1': "Main St", 'address2': f"{city}, {state}"}
         else:
-            return {}  # No valid parameters
+            return None  # No valid parameters
 
         if page_size:
             params['pagesize'] = min(page_size, 100)
-
         return params
 
     def _extract_properties(self, data: Dict) -> List[Dict]:
         """Extract property data from ATTOM API response"""
-        if not data:
-            return []
-
-        # Handle different response structures
-        if 'property' in data:
-            properties = data['property']
-            if isinstance(properties, list):
-                return properties
-            elif isinstance(properties, dict):
-                return [properties]
-
+        # Handle different response structures: a list, or a single record
+        properties = data.get('property') if data else None
+        if isinstance(properties, list):
+            return properties
+        if isinstance(properties, dict):
+            return [properties]
         return []
 
 
 class PropertyDataSyncer:
     """Main service for syncing property data from ATTOM API ONLY"""
 
+    # Monthly rent as a fraction of price: the 1% rule, adjusted by market
+    BASE_RENT_RATIO = 0.01
+    CITY_RENT_RATIOS = {
+        'denver': 0.012,    # Higher rental yields
+        'atlanta': 0.015,   # Strong rental market
+        'phoenix': 0.013,   # Good investment market
+        # Lower yields, higher appreciation
+        'miami': 0.008,
+        'chicago': 0.011,   # Stable rental market
+    }
+
     def __init__(self):
         self.attom_service = AttomAPIService()
-        try:
-            self.openai_predictor = OpenAIProfitPredictor()
-        except ValueError as e:
-            logger.warning(f"OpenAI service not available: {e}")
-            self.openai_predictor = None
 
     def sync_properties_by_location(self, city: str, state: str, limit: int = 50) -> List[Property]:
         """Sync properties from ATTOM API - NO FALLBACK DATA"""
-        properties = []
-
         logger.info(
             f"Starting ATTOM API property sync for {city}, {state} with limit {limit}")
 
-        try:
-            property_data_list = self.attom_service.search_properties(
-                city=city, state=state, page_size=limit
-            )
+        # Keyed on attom_id so a repeated listing never hits one row twice
+        records = {
+            fields['attom_id']: fields
+            for fields in self.iter_attom_properties(city, state, limit)
+        }
+        if not records:
+            return []
 
-            if property_data_list:
-                logger.info(
-                    f"ATTOM API returned {len(property_data_list)} properties")
+        try:
+            # One upsert and one vectorized metrics pass for the whole page
+            Property.bulk_ingest(records.values())
+        except Exception as e:
+            logger.error(f"Error saving ATTOM properties: {e}")
+            return []
 
-                for property_data in property_data_list:
-                    property_obj = self._sync_attom_property(
-                        property_data, city, state)
-                    if property_obj:
-                        properties.append(property_obj)
-                        self.calculate_investment_metrics(property_obj)
+        properties = list(Property.objects.filter(attom_id__in=records))
+        logger.info(
+            f"Successfully synced {len(properties)} properties from ATTOM")
+        return properties
 
-                logger.info(
-                    f"Successfully synced {len(properties)} properties from ATTOM")
-            else:
-                logger.warning(
-                    f"No properties found via ATTOM API for {city}, {state}")
+    def _parse_attom_property(self, property_data: Dict) -> Optional[Dict]:
+        """Convert an ATTOM API record into Property field values"""
+        logger.debug("Processing ATTOM property data: %s", property_data.keys())
+
+        # Extract data from real ATTOM API response structure
+        address_info = property_data.get('address', {})
+        summary_info = property_data.get('summary', {})
+        building_info = property_data.get('building', {})
+        assessment_info = property_data.get('assessment', {})
+        sale_info = property_data.get('sale', {})
+        location_info = property_data.get('location', {})
+        lot_info = property_data.get('lot', {})
+        identifier_info = property_data.get('identifier', {})
+
+        # Extract address information
+        address_line = address_info.get('line1', '')
+        if not address_line:
+            logger.warning("No address found in ATTOM response")
+            return None
 
-        except Exception as e:
-            logger.error(f"Error accessing ATTOM API: {e}")
+        prop_city = address_info.get('locality', '')
+        prop_state = address_info.get('countrySubd', '')
+        zip_code = address_info.get('postal1', '')
+
+        # Extract ATTOM ID
+        attom_id = identifier_info.get(
+            'attomId') or identifier_info.get('Id')
+        # Store missing IDs as NULL; a blank string would hit the unique index
+        attom_id = str(attom_id) if attom_id else None
+
+        # Extract coordinates
+        latitude = location_info.get('latitude')
+        longitude = location_info.get('longitude')
+        if latitude:
+            latitude = _as_decimal(latitude)
+        if longitude:
+            longitude = _as_decimal(longitude)
+
+        # Extract property details
+        property_type = summary_info.get(
+            'propertyType', 'Single Family Residence')
+        year_built = summary_info.get(
+            'yearBuilt') or summary_info.get('yearbuilt')
+
+        # Extract lot size
+        lot_size = lot_info.get('lotSize1') or lot_info.get('lotsize1')
+        if lot_size:
+            lot_size = _as_decimal(lot_size)
+
+        # Extract building details
+        size_info = building_info.get('size', {})
+        rooms_info = building_info.get('rooms', {})
+
+        square_feet = size_info.get('livingSize') or size_info.get(
+            'bldgSize') or size_info.get('livingsize') or size_info.get('bldgsize')
+        bedrooms = rooms_info.get('beds')
+        bathrooms = rooms_info.get(
+            'bathsTotal') or rooms_info.get('bathstotal')
+
+        # Extract pricing information
+        current_price = None
+        estimated_value = None
+        tax_assessment = None
+        annual_taxes = None
+
+        # Try to get sale price - handle both response structures
+        if sale_info:
+            # Method 1: amount structure (expanded profile)
+            amount_info = sale_info.get('amount', {})
+            if amount_info:
+                current_price = amount_info.get('saleAmt')
+                logger.debug(
+                    "Found sale price in amount structure: %s", current_price)
+
+            # Method 2: saleAmountData structure (basic profile)
+            if not current_price:
+                sale_amount_data = sale_info.get('saleAmountData', {})
+                if sale_amount_data:
+                    current_price = sale_amount_data.get('saleAmt')
+                    logger.debug(
+                        "Found sale price in saleAmountData: %s", current_price)
+
+        # Try to get market value and tax data from assessment
+        if assessment_info:
+            market_info = assessment_info.get('market', {})
+            if market_info:
+                estimated_value = market_info.get('mktTtlValue')
+
+            # Get assessed value for tax assessment
+            assessed_info = assessment_info.get('assessed', {})
+            if assessed_info:
+                tax_assessment = assessed_info.get('assdTtlValue')
+
+            # Get tax information
+            tax_info = assessment_info.get('tax', {})
+            if tax_info:
+                annual_taxes = tax_info.get('taxAmt')
+
+        # Convert to Decimal
+        if current_price:
+            current_price = _as_decimal(current_price)
+        if estimated_value:
+            estimated_value = _as_decimal(estimated_value)
+        if tax_assessment:
+            tax_assessment = _as_decimal(tax_assessment)
+        if annual_taxes:
+            annual_taxes = _as_decimal(annual_taxes)
+
+        # Estimate rent based on market data (1% rule + location adjustments)
+        estimated_rent = None
+        price_for_rent = current_price or estimated_value
+        if price_for_rent:
+            # Base 1% rule, adjusted by location
+            rent_ratio = self.CITY_RENT_RATIOS.get(
+                prop_city.lower(), self.BASE_RENT_RATIO)
+            # An estimate, so float math; only the stored value is a Decimal
+            estimated_rent = Decimal(
+                f"{float(price_for_rent) * rent_ratio:.2f}")
 
-        return properties
+        return {
+            'address': address_line,
+            'city': prop_city,
+            'state': prop_state,
+            'zip_code': zip_code,
+            'latitude': latitude,
+            'longitude': longitude,
+            'property_type': property_type,
+            'bedrooms': int(bedrooms) if bedrooms else None,
+            'bathrooms': _as_decimal(bathrooms) if bathrooms else None,
+            'square_feet': int(square_feet) if square_feet else None,
+            'lot_size': lot_size,
+            'year_built': int(year_built) if year_built else None,
+            'current_price': current_price,
+            'estimated_value': estimated_value,
+            'tax_assessment': tax_assessment,
+            'annual_taxes': annual_taxes,
+            'estimated_rent': estimated_rent,
+            'attom_id': attom_id,
+            'days_on_market': None,  # Not available in ATTOM response
+            'last_api_sync': timezone.now()
+        }
 
-    def _sync_attom_property(self, property_data: Dict, city: str, state: str) -> Optional[Property]:
+    def _sync_attom_property(self, property_data: Dict, city: str, state: str,
+                             calculate_metrics: bool = True) -> Optional[Property]:
         """Convert ATTOM API response to Property model"""
         try:
-            logger.info(
-                f"Processing ATTOM property data: {property_data.keys()}")
-
-            # Extract data from real ATTOM API response structure
-            address_info = property_data.get('address', {})
-            summary_info = property_data.get('summary', {})
-            building_info = property_data.get('building', {})
-            assessment_info = property_data.get('assessment', {})
-            sale_info = property_data.get('sale', {})
-            location_info = property_data.get('location', {})
-            lot_info = property_data.get('lot', {})
-            identifier_info = property_data.get('identifier', {})
-
-            # Extract address information
-            address_line = address_info.get('line1', '')
-            if not address_line:
-                logger.warning("No address found in ATTOM response")
+            fields = self._parse_attom_property(property_data)
+            if not fields:
                 return None
 
-            prop_city = address_info.get('locality', '')
-            prop_state = address_info.get('countrySubd', '')
-            zip_code = address_info.get('postal1', '')
-
-            # Extract ATTOM ID
-            attom_id = identifier_info.get(
-                'attomId') or identifier_info.get('Id')
-            if attom_id:
-                attom_id = str(attom_id)
-
-            # Extract coordinates
-            latitude = location_info.get('latitude')
-            longitude = location_info.get('longitude')
-            if latitude:
-                latitude = Decimal(str(latitude))
-            if longitude:
-                longitude = Decimal(str(longitude))
-
-            # Extract property details
-            property_type = summary_info.get(
-                'propertyType', 'Single Family Residence')
-            year_built = summary_info.get(
-                'yearBuilt') or summary_info.get('yearbuilt')
-
-            # Extract lot size
-            lot_size = lot_info.get('lotSize1') or lot_info.get('lotsize1')
-            if lot_size:
-                lot_size = Decimal(str(lot_size))
-
-            # Extract building details
-            size_info = building_info.get('size', {})
-            rooms_info = building_info.get('rooms', {})
-
-            square_feet = size_info.get('livingSize') or size_info.get(
-                'bldgSize') or size_info.get('livingsize') or size_info.get('bldgsize')
-            bedrooms = rooms_info.get('beds')
-            bathrooms = rooms_info.get(
-                'bathsTotal') or rooms_info.get('bathstotal')
-
-            # Extract pricing information
-            current_price = None
-            estimated_value = None
-            tax_assessment = None
-            annual_taxes = None
-
-            # Try to get sale price - handle both response structures
-            if sale_info:
-                # Method 1: amount structure (expanded profile)
-                amount_info = sale_info.get('amount', {})
-                if amount_info:
-                    current_price = amount_info.get('saleAmt')
-                    logger.info(
-                        f"Found sale price in amount structure: {current_price}")
-
-                # Method 2: saleAmountData structure (basic profile)
-                if not current_price:
-                    sale_amount_data = sale_info.get('saleAmountData', {})
-                    if sale_amount_data:
-                        current_price = sale_amount_data.get('saleAmt')
-                        logger.info(
-                            f"Found sale price in saleAmountData: {current_price}")
-
-            # Try to get market value and tax data from assessment
-            if assessment_info:
-                market_info = assessment_info.get('market', {})
-                if market_info:
-                    estimated_value = market_info.get('mktTtlValue')
-
-                # Get assessed value for tax assessment
-                assessed_info = assessment_info.get('assessed', {})
-                if assessed_info:
-                    tax_assessment = assessed_info.get('assdTtlValue')
-
-                # Get tax information
-                tax_info = assessment_info.get('tax', {})
-                if tax_info:
-                    annual_taxes = tax_info.get('taxAmt')
-
-            # Convert to Decimal
-            if current_price:
-                current_price = Decimal(str(current_price))
-                logger.info(
-                    f"Converted current_price to Decimal: {current_price}")
-            if estimated_value:
-                estimated_value = Decimal(str(estimated_value))
-            if tax_assessment:
-                tax_assessment = Decimal(str(tax_assessment))
-            if annual_taxes:
-                annual_taxes = Decimal(str(annual_taxes))
-
-            # Estimate rent based on market data (1% rule + location adjustments)
-            estimated_rent = None
-            price_for_rent = current_price or estimated_value
-            if price_for_rent:
-                # Base 1% rule, but adjust by location and property type
-                base_rent_ratio = Decimal('0.01')
-
-                # Location adjustments for rental yields
-                city_adjustments = {
-                    'denver': Decimal('0.012'),    # Higher rental yields
-                    'atlanta': Decimal('0.015'),   # Strong rental market
-                    'phoenix': Decimal('0.013'),   # Good investment market
-                    # Lower yields, higher appreciation
-                    'miami': Decimal('0.008'),
-                    'chicago': Decimal('0.011'),   # Stable rental market
-                }
-
-                rent_ratio = city_adjustments.get(
-                    prop_city.lower(), base_rent_ratio)
-                estimated_rent = price_for_rent * rent_ratio
-
             # Create or update property
             property_obj, created = Property.objects.get_or_create(
-                address=address_line,
-                city=prop_city,
-                state=prop_state,
-                defaults={
-                    'zip_code': zip_code,
-                    'latitude': latitude,
-                    'longitude': longitude,
-                    'property_type': property_type,
-                    'bedrooms': int(bedrooms) if bedrooms else None,
-                    'bathrooms': Decimal(str(bathrooms)) if bathrooms else None,
-                    'square_feet': int(square_feet) if square_feet else None,
-                    'lot_size': lot_size,
-                    'year_built': int(year_built) if year_built else None,
-                    'current_price': current_price,
-                    'estimated_value': estimated_value,
-                    'tax_assessment': tax_assessment,
-                    'annual_taxes': annual_taxes,
-                    'estimated_rent': estimated_rent,
-                    'attom_id': attom_id,
-                    'days_on_market': None,  # Not available in ATTOM response
-                    'last_api_sync': timezone.now()
-                }
+                address=fields.pop('address'),
+                city=fields.pop('city'),
+                state=fields.pop('state'),
+                defaults=fields
             )
 
             # If property already exists, update key fields
             if not created:
-                property_obj.zip_code = zip_code or property_obj.zip_code
-                property_obj.latitude = latitude or property_obj.latitude
-                property_obj.longitude = longitude or property_obj.longitude
-                property_obj.property_type = property_type or property_obj.property_type
-                property_obj.bedrooms = int(
-                    bedrooms) if bedrooms else property_obj.bedrooms
-                property_obj.bathrooms = Decimal(
-                    str(bathrooms)) if bathrooms else property_obj.bathrooms
-                property_obj.square_feet = int(
-                    square_feet) if square_feet else property_obj.square_feet
-                property_obj.lot_size = lot_size or property_obj.lot_size
-                property_obj.year_built = int(
-                    year_built) if year_built else property_obj.year_built
-                property_obj.current_price = current_price or property_obj.current_price
-                property_obj.estimated_value = estimated_value or property_obj.estimated_value
-                property_obj.tax_assessment = tax_assessment or property_obj.tax_assessment
-                property_obj.annual_taxes = annual_taxes or property_obj.annual_taxes
-                property_obj.estimated_rent = estimated_rent or property_obj.estimated_rent
-                property_obj.attom_id = attom_id or property_obj.attom_id
-                property_obj.last_api_sync = timezone.now()
-                property_obj.save()
-
-            logger.info(
-                f"{'Created' if created else 'Updated'} property from ATTOM: {property_obj.address}")
-            logger.info(
-                f"Property details - Price: {current_price}, Bedrooms: {bedrooms}, Bathrooms: {bathrooms}, Sqft: {square_feet}")
-
-            # Always calculate investment metrics for new/updated properties
-            self.calculate_investment_metrics(property_obj)
+                refreshed = [field for field, value in fields.items() if value]
+                for field in refreshed:
+                    setattr(property_obj, field, fields[field])
+                # Write only the refreshed columns, not the whole row
+                property_obj.save(update_fields=[*refreshed, 'updated_at'])
+
+            logger.info("%s property from ATTOM: %s",
+                        'Created' if created else 'Updated', property_obj.address)
+            logger.debug(
+                "Property details - Price: %s, Bedrooms: %s, Bathrooms: %s, Sqft: %s",
+                fields['current_price'], fields['bedrooms'],
+                fields['bathrooms'], fields['square_feet'])
+
+            # Calculate investment metrics unless the caller batches them
+            if calculate_metrics:
+                self.calculate_investment_metrics(property_obj)
 
             return property_obj
 
@@ -553,6 +697,44 @@ class PropertyDataSyncer:
             logger.error(f"Error syncing ATTOM property data: {e}")
             return None
 
+    def iter_attom_properties(self, city: str, state: str, limit: int = 50) -> Iterator[Dict]:
+        """Yield Property field dicts for a location, for Property.bulk_ingest"""
+        try:
+            property_data_list = self.attom_service.search_properties(
+                city=city, state=state, page_size=limit
+            )
+        except Exception as e:
+            logger.error(f"Error accessing ATTOM API: {e}")
+            return
+
+        if not property_data_list:
+            logger.warning(
+                f"No properties found via ATTOM API for {city}, {state}")
+            return
+
+        logger.info(f"ATTOM API returned {len(property_data_list)} properties")
+        seen = set()
+        for property_data in property_data_list:
+            # Listings can repeat within a response; skip parsing the repeats
+            identifier_info = property_data.get('identifier') or {}
+            attom_id = identifier_info.get('attomId') or identifier_info.get('Id')
+            if attom_id and str(attom_id) in seen:
+                continue
+            try:
+                fields = self._parse_attom_property(property_data)
+            except Exception as e:
+                logger.error(f"Error parsing ATTOM property data: {e}")
+                continue
+            if not fields:
+                continue
+            # Upserts are keyed on attom_id, rows without one can't be matched
+            if not fields['attom_id']:
+                logger.warning(
+                    f"Skipping ATTOM property without an ID: {fields['address']}")
+                continue
+            seen.add(fields['attom_id'])
+            yield fields
+
     def calculate_investment_metrics(self, property_obj: Property):
         """Calculate investment metrics for a property"""
         metrics, created = InvestmentMetrics.objects.get_or_create(
@@ -560,8 +742,8 @@ class PropertyDataSyncer:
         metrics.calculate_metrics()
         return metrics
 
-    def bulk_sync_attom_data(self):
-        """Sync real ATTOM data from multiple markets"""
+    def bulk_sync_attom_data(self) -> Iterator[Dict]:
+        """Yield ATTOM property field dicts from multiple markets"""
         sample_markets = [
             ('Atlanta', 'GA'),
             ('Phoenix', 'AZ'),
@@ -573,14 +755,17 @@ class PropertyDataSyncer:
             ('Chicago', 'IL')
         ]
 
-        all_properties = []
-        for city, state in sample_markets:
+        def fetch_market(city, state):
             logger.info(f"Syncing ATTOM properties from {city}, {state}")
-            properties = self.sync_properties_by_location(
-                city, state, limit=20)
-            all_properties.extend(properties)
+            return list(self.iter_attom_properties(city, state, limit=20))
 
-        return all_properties
+        # Markets are independent, so fetch them all at once and hand each
+        # one on as soon as it arrives
+        with ThreadPoolExecutor(max_workers=len(sample_markets)) as executor:
+            futures = [executor.submit(fetch_market, city, state)
+                       for city, state in sample_markets]
+            for future in as_completed(futures):
+                yield from future.result()
 
 
 class PropertyValuationService:
@@ -677,6 +862,11 @@ class PropertyValuationService:
             try:
                 metrics, created = InvestmentMetrics.objects.get_or_create(
                     property_ref=property_obj)
+                # Reuse the loaded property instead of fetching it again; the
+                # valuation's post_save receiver wrote the new ROI in SQL
+                property_obj.refresh_from_db(
+                    fields=['latest_ai_roi_percent', 'latest_ai_roi_at'])
+                metrics.property_ref = property_obj
                 metrics.calculate_metrics()
                 logger.info(
                     f"Updated investment metrics with AI ROI for {property_obj.address}")
@@ -819,8 +1009,6 @@ Please structure your response as follows:
 
     def _parse_valuation_response(self, response_text: str, property_obj: Property) -> Dict:
         """Parse OpenAI valuation response into structured data"""
-        import re
-
         valuation_data = {
             'fair_market_value': None,
             'annual_noi': None,
@@ -0,0 +1,37 @@
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Property, PropertyValuation
+
+
+@receiver(post_save, sender=PropertyValuation)
+def update_latest_ai_roi(sender, instance, **kwargs):
+    """Copy a newer successful valuation ROI onto its Property"""
+    if not instance.valuation_successful or instance.five_year_roi_percent is None:
+        return
+    Property.objects.filter(
+        Q(latest_ai_roi_at__isnull=True) |
+        Q(latest_ai_roi_at__lte=instance.created_at),
+        pk=instance.property_ref_id
+    ).update(
+        latest_ai_roi_percent=instance.annual_roi_percent,
+        latest_ai_roi_at=instance.created_at
+    )
+
+
+@receiver(post_delete, sender=PropertyValuation)
+def replace_latest_ai_roi(sender, instance, **kwargs):
+    """Fall back to the next newest valuation when the copied one is deleted"""
+    latest = PropertyValuation.objects.filter(
+        property_ref_id=instance.property_ref_id,
+        valuation_successful=True,
+        five_year_roi_percent__isnull=False
+    ).order_by('-created_at').values_list(
+        'annual_roi_percent', 'created_at').first() or (None, None)
+    Property.objects.filter(
+        pk=instance.property_ref_id,
+        latest_ai_roi_at=instance.created_at
+    ).update(
+        latest_ai_roi_percent=latest[0],
+        latest_ai_roi_at=latest[1]
+    )
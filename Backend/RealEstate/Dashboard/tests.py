@@ -1,3 +1,295 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import (
+    Deal, DealStage, InvestmentMetrics, PortfolioMetrics, Property,
+    PropertyValuation, RentalTransaction, UserOwnedProperty)
+from .services import PropertyDataSyncer
+
+
+def make_property(number, **fields):
+    fields.setdefault('current_price', Decimal('250000'))
+    fields.setdefault('estimated_rent', Decimal('2500'))
+    return Property.objects.create(
+        address=f"{number} Oak Ave", city='Atlanta', state='GA',
+        zip_code='30301', property_type='Single Family Residence', **fields)
+
+
+@override_settings(ATTOM_API_KEY='test-key')
+class SyncPropertiesByLocationTests(TestCase):
+    """sync_properties_by_location computes metrics once per sync"""
+
+    def attom_fields(self, attom_id, price):
+        return {
+            'address': f"{attom_id} Main St", 'city': 'Denver', 'state': 'CO',
+            'zip_code': '80202', 'property_type': 'Single Family Residence',
+            'current_price': Decimal(price),
+            'estimated_rent': Decimal(price) / 100,
+            'attom_id': attom_id, 'last_api_sync': timezone.now(),
+        }
+
+    def test_metrics_computed_in_one_pass(self):
+        syncer = PropertyDataSyncer()
+        records = [self.attom_fields('1', 300000), self.attom_fields('2', 400000),
+                   self.attom_fields('1', 300000)]
+        with mock.patch.object(PropertyDataSyncer, 'iter_attom_properties',
+                               return_value=iter(records)), \
+                mock.patch.object(InvestmentMetrics, 'recompute_all',
+                                  return_value=2) as recompute_all, \
+                mock.patch.object(InvestmentMetrics,
+                                  'calculate_metrics') as calculate_metrics:
+            synced = syncer.sync_properties_by_location('Denver', 'CO')
+
+        self.assertEqual(len(synced), 2)
+        recompute_all.assert_called_once()
+        self.assertCountEqual(
+            recompute_all.call_args.args[0].values_list('attom_id', flat=True),
+            ['1', '2'])
+        calculate_metrics.assert_not_called()
+        self.assertEqual(InvestmentMetrics.objects.count(), 2)
+        self.assertEqual(Property.objects.count(), 2)
+
+
+class RecomputeAllTests(TestCase):
+    """recompute_all writes the same columns as calculate_metrics"""
+
+    def setUp(self):
+        self.properties = [
+            make_property(1, estimated_value=Decimal('300000')),
+            # A zero estimate counts as missing: the previous profit stays
+            make_property(2, estimated_value=Decimal('0')),
+            make_property(3, latest_ai_roi_percent=Decimal('7.50')),
+            make_property(4, current_price=Decimal('180000'),
+                          estimated_rent=Decimal('1400'),
+                          estimated_value=Decimal('150000')),
+        ]
+        for prop in self.properties:
+            InvestmentMetrics.objects.create(
+                property_ref=prop, estimated_profit=Decimal('12000.00'))
+
+    def metric_values(self):
+        fields = [field for field in InvestmentMetrics.METRIC_FIELDS
+                  if field != 'calculated_at']
+        return {
+            metrics['property_ref']: metrics
+            for metrics in InvestmentMetrics.objects.values(
+                'property_ref', *fields)
+        }
+
+    def reset(self):
+        InvestmentMetrics.objects.update(
+            gross_rental_yield=None, net_operating_income=None, cap_rate=None,
+            annualized_return=None, price_to_rent_ratio=None, roi=None,
+            estimated_profit=Decimal('12000.00'), risk_score=None,
+            investment_score=None)
+
+    @mock.patch.object(InvestmentMetrics, '_predict_profits', return_value={})
+    def test_matches_calculate_metrics(self, predict_profits):
+        for metrics in InvestmentMetrics.objects.select_related('property_ref'):
+            metrics.calculate_metrics()
+        expected = self.metric_values()
+
+        self.reset()
+        updated = InvestmentMetrics.recompute_all(
+            Property.objects.all(), predict_profit=False)
+
+        self.assertEqual(updated, len(self.properties))
+        self.assertEqual(self.metric_values(), expected)
+        self.assertEqual(
+            expected[self.properties[1].pk]['estimated_profit'],
+            Decimal('12000.00'))
+
+
+class RecomputeScoresSqlTests(TestCase):
+    """recompute_scores_sql over stored metric columns"""
+
+    def create_metrics(self, number, price):
+        return InvestmentMetrics.objects.create(
+            property_ref=make_property(number, current_price=Decimal(price)),
+            cap_rate=Decimal('8.40'), net_operating_income=Decimal('21000.00'),
+            price_to_rent_ratio=Decimal('8.33'), risk_score=Decimal('1.0'),
+            estimated_profit=Decimal('50000.00'))
+
+    def test_zero_price_scores_without_appreciation(self):
+        priced = self.create_metrics(1, '250000')
+        unpriced = self.create_metrics(2, '0')
+
+        self.assertEqual(InvestmentMetrics.recompute_scores_sql(), 2)
+
+        # cap rate 33.6 + cash flow 4.375 + efficiency 10 + risk 4.5
+        base = 33.6 + 4.375 + 10 + 4.5
+        priced.refresh_from_db()
+        unpriced.refresh_from_db()
+        self.assertAlmostEqual(float(priced.investment_score), base + 8,
+                               delta=0.01)
+        self.assertAlmostEqual(float(unpriced.investment_score), base,
+                               delta=0.01)
+        unpriced.property_ref.refresh_from_db()
+        self.assertEqual(unpriced.property_ref.cached_investment_score,
+                         unpriced.investment_score)
+
+
+class DealReorderTests(TestCase):
+    """Deal.reorder moves deals between stages in one UPDATE"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('agent', password='secret')
+        self.review, _ = DealStage.objects.get_or_create(
+            name='review', defaults={'display_name': 'Review', 'order': 1})
+        self.active, _ = DealStage.objects.get_or_create(
+            name='active', defaults={'display_name': 'Active', 'order': 2})
+        self.staying = self.create_deal('Staying', self.active, 0)
+        self.moving = self.create_deal('Moving', self.review, 0)
+        self.last = self.create_deal('Last', self.active, 1)
+        # Backdate the rows so a fresh updated_at is detectable
+        self.stamped = timezone.now() - timedelta(days=5)
+        Deal.objects.update(updated_at=self.stamped)
+
+    def create_deal(self, title, stage, position):
+        return Deal.objects.create(title=title, stage=stage, position=position,
+                                   created_by=self.user)
+
+    def test_reorder_across_stages(self):
+        updated = Deal.reorder(
+            self.active.pk, [self.moving.pk, self.staying.pk, self.last.pk])
+
+        self.assertEqual(updated, 3)
+        deals = {deal.pk: deal for deal in Deal.objects.all()}
+        self.assertEqual(
+            [deals[pk].position
+             for pk in (self.moving.pk, self.staying.pk, self.last.pk)],
+            [0, 1, 2])
+        self.assertTrue(all(deal.stage_id == self.active.pk
+                            for deal in deals.values()))
+        self.assertGreater(deals[self.moving.pk].updated_at, self.stamped)
+        self.assertEqual(deals[self.staying.pk].updated_at, self.stamped)
+        self.assertEqual(deals[self.last.pk].updated_at, self.stamped)
+
+    def test_empty_order_updates_nothing(self):
+        self.assertEqual(Deal.reorder(self.active.pk, []), 0)
+
+
+def baseline_portfolio(user):
+    """PortfolioMetrics.calculate_metrics' figures, one holding at a time"""
+    owned = list(UserOwnedProperty.objects.filter(user=user))
+    investment = sum(prop.purchase_price for prop in owned)
+    value = sum(prop.current_estimated_value or prop.purchase_price
+                for prop in owned)
+    equity = sum(prop.current_equity or
+                 prop.current_estimated_value or prop.purchase_price
+                 for prop in owned)
+    recent = RentalTransaction.objects.filter(
+        owned_property__user=user, date__gte=date.today() - timedelta(days=365))
+    income = sum(t.amount for t in recent if t.transaction_type == 'income')
+    expenses = sum(t.amount for t in recent if t.transaction_type == 'expense')
+    cash_flow = income - expenses
+    down_payments = sum(prop.down_payment for prop in owned
+                        if prop.down_payment) or investment
+    return {
+        'total_properties': len(owned),
+        'total_investment': investment,
+        'portfolio_value': value,
+        'total_equity': equity,
+        'total_appreciation': value - investment,
+        'appreciation_percentage': (value - investment) / investment * 100,
+        'annual_cash_flow': cash_flow,
+        'monthly_cash_flow': cash_flow / 12,
+        'total_monthly_income': income / 12,
+        'total_monthly_expenses': expenses / 12,
+        'cash_on_cash_return': cash_flow / down_payments * 100,
+        'total_return_percentage':
+            (value - investment + cash_flow) / investment * 100,
+        'portfolio_cap_rate': cash_flow / value * 100,
+        'diversification_score':
+            min(len({prop.property_type for prop in owned}), 5) +
+            min(len({prop.city for prop in owned}), 5),
+    }
+
+
+class PortfolioMetricsTests(TestCase):
+    """PortfolioMetrics.calculate_metrics against per-holding arithmetic"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('investor', password='secret')
+        today = date.today()
+        financed = UserOwnedProperty.objects.create(
+            user=self.user, property_ref=make_property(1),
+            purchase_price=Decimal('240000'),
+            purchase_date=today - timedelta(days=800),
+            down_payment=Decimal('48000'), loan_amount=Decimal('192000'),
+            interest_rate=Decimal('6.50'), loan_term_years=30,
+            current_estimated_value=Decimal('265000'))
+        custom = UserOwnedProperty.objects.create(
+            user=self.user, custom_address='9 Pine Rd', custom_city='Macon',
+            custom_state='GA', custom_property_type='Condo',
+            purchase_price=Decimal('120000'),
+            purchase_date=today - timedelta(days=400))
+        for owned, kind, category, amount, days_ago in (
+                (financed, 'income', 'rent', '2100', 30),
+                (financed, 'expense', 'mortgage', '1214', 30),
+                (custom, 'income', 'rent', '1150', 60),
+                (custom, 'expense', 'maintenance', '300', 90),
+                # Older than a year, so left out of the cash flow
+                (custom, 'income', 'rent', '1100', 400)):
+            RentalTransaction.objects.create(
+                owned_property=owned, transaction_type=kind,
+                category=category, amount=Decimal(amount),
+                date=today - timedelta(days=days_ago))
+
+    def test_matches_baseline(self):
+        metrics = PortfolioMetrics.objects.create(user=self.user)
+        metrics.calculate_metrics()
+        metrics.refresh_from_db()
+
+        for field, expected in baseline_portfolio(self.user).items():
+            with self.subTest(field=field):
+                self.assertAlmostEqual(float(getattr(metrics, field)),
+                                       float(expected), delta=0.01)
+
+
+class LatestAiRoiSignalTests(TestCase):
+    """The latest successful valuation ROI is copied onto its Property"""
+
+    def setUp(self):
+        self.property = make_property(1)
+
+    def valuate(self, five_year_roi, successful=True):
+        return PropertyValuation.objects.create(
+            property_ref=self.property, valuation_successful=successful,
+            five_year_roi_percent=Decimal(five_year_roi))
+
+    def assertLatest(self, roi, valuation):
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.latest_ai_roi_percent, roi)
+        self.assertEqual(self.property.latest_ai_roi_at,
+                         valuation.created_at if valuation else None)
+
+    def test_successful_valuation_is_copied(self):
+        older = self.valuate('30.00')
+        self.assertLatest(Decimal('6.00'), older)
+        newer = self.valuate('45.00')
+        self.assertLatest(Decimal('9.00'), newer)
+
+    def test_failed_valuation_is_ignored(self):
+        valuation = self.valuate('30.00')
+        self.valuate('45.00', successful=False)
+        self.assertLatest(Decimal('6.00'), valuation)
+
+    def test_delete_falls_back_to_previous_valuation(self):
+        older = self.valuate('30.00')
+        newer = self.valuate('45.00')
+        newer.delete()
+        self.assertLatest(Decimal('6.00'), older)
+        older.delete()
+        self.assertLatest(None, None)
+
+    def test_deleting_older_valuation_keeps_latest(self):
+        older = self.valuate('30.00')
+        newer = self.valuate('45.00')
+        older.delete()
+        self.assertLatest(Decimal('9.00'), newer)
@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import Q, Avg, Case, When, Value, DecimalField
+from django.db.models import Q, Avg, Case, When, Value, DecimalField, Sum, Count
 from django.db import models
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import api_view, permission_classes
@@ -8,11 +8,16 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Property, InvestmentMetrics, UserWatchlist, MarketData, Deal, DealStage, UserOwnedProperty, RentalTransaction, PortfolioMetrics
-from .services import PropertyDataSyncer
-from .filters import PropertyFilter
+from openai import OpenAI
+from .models import Property, InvestmentMetrics, UserWatchlist, MarketData, Deal, DealStage, UserOwnedProperty, RentalTransaction, PortfolioMetrics, PropertyValuation
+from .services import AttomAPIService, PropertyDataSyncer, PropertyValuationService
+from .filters import PropertyFilter, resolve_ordering
+from datetime import date, timedelta
+import calendar
+import json
 import logging
 import os
+import time
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
@@ -50,7 +55,6 @@ def generate_realistic_rental_data_with_ai(property_data):
         Base the estimates on current market conditions for the location and property type.
         """
 
-        from openai import OpenAI
         client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
         response = client.chat.completions.create(
@@ -63,7 +67,6 @@ def generate_realistic_rental_data_with_ai(property_data):
             temperature=0.3
         )
 
-        import json
         ai_data = json.loads(response.choices[0].message.content)
         return ai_data
 
@@ -222,10 +225,10 @@ def investment_opportunities(request):
 def dashboard_stats(request):
     """Get dashboard statistics - ATTOM API data only"""
     # Only count properties that came from ATTOM API (have last_api_sync timestamp)
-    total_properties = Property.objects.filter(
-        last_api_sync__isnull=False).count()
-    properties_with_metrics = Property.objects.filter(
-        metrics__isnull=False, last_api_sync__isnull=False).count()
+    counts = Property.objects.filter(last_api_sync__isnull=False).aggregate(
+        total=Count('id'), with_metrics=Count('metrics'))
+    total_properties = counts['total']
+    properties_with_metrics = counts['with_metrics']
 
     if total_properties == 0:
         return Response({
@@ -249,11 +252,14 @@ def dashboard_stats(request):
         avg_gross_yield=Avg('gross_rental_yield'),
     )
 
-    # Get top performing properties from ATTOM API only
+    # Get top performing properties from ATTOM API only, ranked and rendered
+    # from the metric copies denormalized onto Property
     top_properties = Property.objects.filter(
         metrics__isnull=False,
         last_api_sync__isnull=False
-    ).select_related('metrics').order_by('-metrics__investment_score')[:5]
+    ).only(
+        'address', 'city', 'state', 'cached_investment_score', 'cached_cap_rate'
+    ).order_by(models.F('cached_investment_score').desc(nulls_last=True))[:5]
 
     top_properties_data = []
     for prop in top_properties:
@@ -261,8 +267,8 @@ def dashboard_stats(request):
             'address': prop.address,
             'city': prop.city,
             'state': prop.state,
-            'investment_score': float(prop.metrics.investment_score) if prop.metrics.investment_score else 0,
-            'cap_rate': float(prop.metrics.cap_rate) if prop.metrics.cap_rate else 0,
+            'investment_score': float(prop.cached_investment_score) if prop.cached_investment_score else 0,
+            'cap_rate': float(prop.cached_cap_rate) if prop.cached_cap_rate else 0,
         })
 
     return Response({
@@ -295,18 +301,11 @@ def sync_property_data(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        from .services import AttomAPIService
         attom_service = AttomAPIService()
 
         # Try different ATTOM endpoints with the specific address
-        endpoints = [
-            '/propertyapi/v1.0.0/property/expandedprofile',
-            '/propertyapi/v1.0.0/property/basicprofile',
-            '/propertyapi/v1.0.0/assessment/detail'
-        ]
-
         property_data = None
-        for endpoint in endpoints:
+        for endpoint in AttomAPIService.SEARCH_ENDPOINTS:
             params = {'address1': address1, 'address2': address2}
             data = attom_service._make_request(endpoint, params)
             if data:
@@ -616,15 +615,10 @@ def best_deals(request):
     property_filter = PropertyFilter(request.GET, queryset=queryset)
     filtered_queryset = property_filter.qs
 
-    # Handle custom sorting if no ordering specified
-    ordering = request.GET.get('ordering', '-metrics__investment_score')
-    if ordering:
-        try:
-            filtered_queryset = filtered_queryset.order_by(ordering)
-        except Exception:
-            # Fallback to default ordering
-            filtered_queryset = filtered_queryset.order_by(
-                '-metrics__investment_score')
+    # Sort on a known key, falling back to the investment score; metric
+    # scores, cap rates and NOI use the copies on Property to skip the JOIN
+    filtered_queryset = filtered_queryset.order_by(resolve_ordering(
+        request.GET.get('ordering') or '-investment_score'))
 
     # Pagination
     limit = int(request.GET.get('limit', 50))
@@ -636,12 +630,6 @@ def best_deals(request):
     # Serialize results
     results = []
     for prop in properties:
-        # Calculate ROI
-        roi = None
-        if prop.metrics.net_operating_income and prop.current_price and prop.current_price > 0:
-            roi = (float(prop.metrics.net_operating_income) /
-                   float(prop.current_price)) * 100
-
         property_data = {
             'id': prop.id,
             'address': prop.address,
@@ -673,7 +661,7 @@ def best_deals(request):
                 'risk_score': float(prop.metrics.risk_score) if prop.metrics.risk_score else None,
                 'estimated_profit': float(prop.metrics.estimated_profit) if prop.metrics.estimated_profit else None,
                 'cash_on_cash_return': float(prop.metrics.cash_on_cash_return) if prop.metrics.cash_on_cash_return else None,
-                'roi': roi,  # Calculated ROI
+                'roi': float(prop.metrics.annualized_return) if prop.metrics.annualized_return else None,
             }
         }
 
@@ -757,7 +745,6 @@ def property_valuation(request):
 
     try:
         # Use the PropertyValuationService to generate valuation
-        from .services import PropertyValuationService
         valuation_service = PropertyValuationService()
 
         result = valuation_service.get_property_valuation(
@@ -784,12 +771,13 @@ def property_valuations(request, property_id):
     try:
         property_obj = Property.objects.get(id=property_id)
 
-        # Import here to avoid circular imports
-        from .models import PropertyValuation
-
-        # Get all valuations for this property, most recent first
+        # Get all valuations for this property, most recent first. The
+        # requester is joined for its username and the raw AI response,
+        # which isn't returned, is left unloaded
         valuations = PropertyValuation.objects.filter(
             property_ref=property_obj
+        ).select_related('requested_by').defer(
+            'raw_ai_response'
         ).order_by('-created_at')
 
         valuation_data = []
@@ -799,6 +787,7 @@ def property_valuations(request, property_id):
                 'fair_market_value': valuation.fair_market_value,
                 'annual_noi': valuation.annual_noi,
                 'five_year_roi_percent': valuation.five_year_roi_percent,
+                'annual_roi_percent': valuation.annual_roi_percent,
                 'monthly_gross_rent': valuation.monthly_gross_rent,
                 'annual_operating_expenses': valuation.annual_operating_expenses,
                 'annual_appreciation_rate': valuation.annual_appreciation_rate,
@@ -810,8 +799,8 @@ def property_valuations(request, property_id):
                 'created_at': valuation.created_at.isoformat(),
                 'requested_by': valuation.requested_by.username if valuation.requested_by else None,
                 'attom_endpoints_used': valuation.attom_endpoints_used,
-                'gross_rental_yield': valuation.gross_rental_yield,
-                'cap_rate': valuation.cap_rate,
+                'gross_rental_yield': float(valuation.gross_rental_yield) if valuation.gross_rental_yield is not None else None,
+                'cap_rate': float(valuation.cap_rate) if valuation.cap_rate is not None else None,
             }
             valuation_data.append(data)
 
@@ -839,9 +828,8 @@ def deals(request):
     """Get all deals or create a new deal"""
     if request.method == 'GET':
         # Get all deals for the kanban board
-        deals_queryset = Deal.objects.select_related(
-            'stage', 'property_ref', 'assigned_to', 'created_by'
-        ).filter(created_by=request.user)
+        deals_queryset = Deal.objects.for_board().filter(
+            created_by=request.user).with_days_in_stage()
 
         # Apply filters
         deal_type_filter = request.GET.get('deal_type')
@@ -963,9 +951,8 @@ def deals(request):
 def deal_detail(request, deal_id):
     """Get, update, or delete a specific deal"""
     try:
-        deal = Deal.objects.select_related(
-            'stage', 'property_ref', 'assigned_to', 'created_by'
-        ).get(id=deal_id, created_by=request.user)
+        deal = Deal.objects.for_board().get(
+            id=deal_id, created_by=request.user)
     except Deal.DoesNotExist:
         return Response({
             'error': 'Deal not found'
@@ -1102,55 +1089,37 @@ def move_deal(request):
             'error': 'Invalid target stage'
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        target_position = max(int(target_position), 0)
+    except (TypeError, ValueError):
+        return Response({
+            'error': 'target_position must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     # Use transaction to ensure data consistency
     with transaction.atomic():
-        old_stage = deal.stage
+        old_stage_id = deal.stage_id
         old_position = deal.position
 
-        # If moving to a different stage, update positions in both stages
-        if old_stage != target_stage:
-            # Remove from old stage (shift positions down)
+        # Rebuild the target column's order and write it back in one UPDATE
+        ordered_ids = list(Deal.objects.filter(
+            stage=target_stage,
+            created_by=request.user
+        ).exclude(id=deal.id).order_by(
+            'position', '-created_at'
+        ).values_list('id', flat=True))
+        ordered_ids.insert(target_position, deal.id)
+        target_position = ordered_ids.index(deal.id)
+        Deal.reorder(target_stage.id, ordered_ids)
+
+        # If the deal left another stage, close the gap it left behind
+        if old_stage_id != target_stage.id:
             Deal.objects.filter(
-                stage=old_stage,
+                stage_id=old_stage_id,
                 position__gt=old_position,
                 created_by=request.user
             ).update(position=models.F('position') - 1)
 
-            # Make room in target stage (shift positions up)
-            Deal.objects.filter(
-                stage=target_stage,
-                position__gte=target_position,
-                created_by=request.user
-            ).update(position=models.F('position') + 1)
-
-            # Update the deal
-            deal.stage = target_stage
-            deal.position = target_position
-            deal.save()
-
-        # If moving within the same stage
-        elif old_position != target_position:
-            if old_position < target_position:
-                # Moving down: shift items up
-                Deal.objects.filter(
-                    stage=target_stage,
-                    position__gt=old_position,
-                    position__lte=target_position,
-                    created_by=request.user
-                ).exclude(id=deal_id).update(position=models.F('position') - 1)
-            else:
-                # Moving up: shift items down
-                Deal.objects.filter(
-                    stage=target_stage,
-                    position__gte=target_position,
-                    position__lt=old_position,
-                    created_by=request.user
-                ).exclude(id=deal_id).update(position=models.F('position') + 1)
-
-            # Update the deal position
-            deal.position = target_position
-            deal.save()
-
     return Response({
         'message': 'Deal moved successfully',
         'deal_id': deal.id,
@@ -1196,7 +1165,8 @@ def deal_types(request):
 def user_portfolio(request):
     """Get user's owned properties or add a new property"""
     if request.method == 'GET':
-        owned_properties = UserOwnedProperty.objects.filter(user=request.user)
+        owned_properties = UserOwnedProperty.objects.filter(
+            user=request.user).with_display_fields()
 
         portfolio_data = []
         for prop in owned_properties:
@@ -1331,9 +1301,6 @@ def user_portfolio(request):
 
         # Create realistic rental transactions for the last 6 months
         if monthly_rent and monthly_rent > 0:
-            from datetime import date, timedelta
-            import calendar
-
             for i in range(6):  # Last 6 months
                 transaction_date = date.today() - timedelta(days=30 * i)
                 month_name = calendar.month_name[transaction_date.month]
@@ -1453,6 +1420,7 @@ def portfolio_property_detail(request, property_id):
             'loan_amount': float(owned_property.loan_amount) if owned_property.loan_amount else None,
             'interest_rate': float(owned_property.interest_rate) if owned_property.interest_rate else None,
             'loan_term_years': owned_property.loan_term_years,
+            'monthly_payment': float(owned_property.monthly_payment) if owned_property.monthly_payment else None,
             'current_estimated_value': float(current_value),
             'last_valuation_date': owned_property.last_valuation_date,
             'monthly_rent': float(owned_property.monthly_rent) if owned_property.monthly_rent else None,
@@ -1537,6 +1505,10 @@ def rental_transactions(request):
             transactions = transactions.filter(
                 transaction_type=transaction_type)
 
+        # property_address reads through owned_property.property_ref
+        transactions = transactions.select_related(
+            'owned_property__property_ref')
+
         transactions_data = []
         for transaction in transactions:
             transactions_data.append({
@@ -1679,7 +1651,8 @@ def portfolio_metrics(request):
 @permission_classes([IsAuthenticated])
 def portfolio_performance_chart_data(request):
     """Get data for portfolio performance charts"""
-    owned_properties = UserOwnedProperty.objects.filter(user=request.user)
+    owned_properties = UserOwnedProperty.objects.filter(
+        user=request.user).with_display_fields()
 
     # Property performance data (for bar chart)
     property_performance = []
@@ -1701,10 +1674,6 @@ def portfolio_performance_chart_data(request):
         })
 
     # Cash flow over time (last 12 months)
-    from datetime import date, timedelta
-    from django.db.models import Sum
-    import calendar
-
     cash_flow_data = []
     for i in range(12):
         month_start = (date.today().replace(day=1) -
@@ -1876,7 +1845,9 @@ def ai_chat(request):
             context_data["market_data"].append(market_prop)
 
         # Add recent deals
-        for deal in user_deals.order_by('-created_at')[:5]:
+        recent_deals = user_deals.select_related(
+            'stage', 'property_ref').order_by('-created_at')[:5]
+        for deal in recent_deals:
             context_data["recent_deals"].append({
                 # This uses the property method that returns property_ref.address
                 "property_address": deal.address,
@@ -1957,9 +1928,6 @@ Please provide a comprehensive answer based on the user's specific portfolio and
 """
 
         # Call OpenAI API with timeout and error handling
-        from openai import OpenAI
-        import time
-
         client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
         start_time = time.time()